@@ -1,15 +1,23 @@
 import os
 import re
-import sqlite3
-from datetime import date
 
 import pandas as pd
 import plotly.express as px
 import requests
 import streamlit as st
 import hashlib
-from database import get_conn, create_user, get_user, init_db
+import time
+from urllib.parse import quote
+from database import create_user, get_user, init_db
 API_BASE = "http://127.0.0.1:8000"
+# Address browsers use for links straight to the API (e.g. JD downloads).
+API_PUBLIC_BASE = os.environ.get("API_PUBLIC_BASE", API_BASE)
+JOB_POLL_INTERVAL = 1.0
+JOB_POLL_TIMEOUT = 600
+ADMIN_CACHE_TTL = 15
+ADMIN_PAGE_SIZE = 20
+JD_LIST_CACHE_TTL = 60
+JD_PAGE_SIZE = 200
 
 init_db()
 
@@ -147,6 +155,41 @@ def signup_page():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+def wait_for_job(job_id):
+    """Poll the scoring queue until the job finishes instead of holding one request open."""
+    deadline = time.monotonic() + JOB_POLL_TIMEOUT
+    while True:
+        job = requests.get(f"{API_BASE}/jobs/{job_id}", timeout=10).json()
+        if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(JOB_POLL_INTERVAL)
+
+
+@st.cache_resource
+def _jd_listing():
+    return {"etag": None, "jds": []}
+
+
+@st.cache_data(ttl=JD_LIST_CACHE_TTL, show_spinner=False)
+def fetch_jds():
+    """Every open posting, newest first. Shared by all sessions; revalidated with the listing's ETag."""
+    listing = _jd_listing()
+    headers = {"If-None-Match": listing["etag"]} if listing["etag"] else {}
+    resp = requests.get(f"{API_BASE}/jds", params={"limit": JD_PAGE_SIZE}, headers=headers, timeout=10)
+    if resp.status_code == 304:
+        return listing["jds"]
+    resp.raise_for_status()
+    page = resp.json()
+    jds = page["job_descriptions"]
+    while page["next_before_id"] is not None:
+        page = requests.get(
+            f"{API_BASE}/jds", params={"limit": JD_PAGE_SIZE, "before_id": page["next_before_id"]}, timeout=10
+        ).json()
+        jds.extend(page["job_descriptions"])
+    listing.update(etag=resp.headers.get("ETag"), jds=jds)
+    return jds
+
+
 def student_page():
     st.markdown('<div class="header">THE VIRTUAL HR</div>', unsafe_allow_html=True)
     st.sidebar.markdown(f"### Welcome, **{st.session_state.user}** 👋")
@@ -158,47 +201,36 @@ def student_page():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("<h3>Available Job Openings</h3>", unsafe_allow_html=True)
 
-    conn = sqlite3.connect("outputs/resume_system.db")
-    jds = pd.read_sql_query(
-        "SELECT role, jd_file, created_at FROM jobs ORDER BY datetime(created_at) DESC",
-        conn,
-    )
-    conn.close()
+    try:
+        jds = fetch_jds()
+    except requests.RequestException as e:
+        st.error(f"Could not load job openings. Make sure the API is running. ({e})")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
 
-    if jds.empty:
+    if not jds:
         st.info("No Job Descriptions have been posted yet.")
         st.markdown("</div>", unsafe_allow_html=True)
         return
 
-    jds = jds.drop_duplicates(subset=["role", "jd_file"]).reset_index(drop=True)
-    
-    roles = jds['role'].tolist()
+    roles = [jd["role"] for jd in jds]
     roles.insert(0, "Select a job opening...")
     
     selected_role = st.selectbox("Choose a job opening from the list below:", roles)
 
     if selected_role != "Select a job opening...":
-        job_details = jds[jds['role'] == selected_role].iloc[0]
-        role = str(job_details.role)
-        jd_file = str(job_details.jd_file)
-        created_at = str(job_details.created_at)
+        job_details = next(jd for jd in jds if jd["role"] == selected_role)
+        role = str(job_details["role"])
+        jd_file = str(job_details["jd_file"])
+        created_at = str(job_details["created_at"])
         uid = hashlib.md5(f"{role}|{jd_file}|{created_at}".encode()).hexdigest()[:10]
 
         st.markdown(f"### Details for: **{role}**")
-        st.markdown(f"📄 **Job Description File:** `{jd_file}`")
+        st.markdown(f"📄 **Job Description File:** `{jd_file}` (revision {job_details.get('revision') or 1})")
         
-        jd_path = os.path.join("data", "jds", jd_file)
-        if os.path.exists(jd_path):
-            with open(jd_path, "rb") as fh:
-                st.download_button(
-                    label="Download JD",
-                    data=fh.read(),
-                    file_name=jd_file,
-                    mime="application/octet-stream",
-                    key=f"dl_{uid}",
-                )
-        else:
-            st.caption("JD file not found on server (ask admin to re-upload).")
+        # The browser downloads straight from the API, which streams the file;
+        # nothing is read into this session's memory.
+        st.link_button("Download JD", f"{API_PUBLIC_BASE}/jds/{quote(jd_file)}/download")
 
         st.markdown("---")
 
@@ -214,18 +246,23 @@ def student_page():
                 st.warning("Please upload a resume before submitting.")
             else:
                 files = {"file": (uploaded.name, uploaded.getvalue())}
-                data = {"student_name": st.session_state.user, "jd_file": jd_file}
+                data = {"student_name": st.session_state.user, "jd_file": jd_file, "queued": "true"}
                 try:
                     with st.spinner("Analyzing your resume..."):
                         resp = requests.post(
                             f"{API_BASE}/upload_resume",
                             data=data,
                             files=files,
-                            timeout=120,
+                            timeout=30,
                         )
+                        job = resp.json() if resp.ok else None
+                        if job and job["status"] not in ("done", "failed"):
+                            job = wait_for_job(job["job_id"])
                     
-                    if resp.ok:
-                        analysis_data = resp.json()
+                    if resp.ok and job["status"] != "done":
+                        st.error(f"Analysis did not complete: {job.get('error') or job['status']}")
+                    elif resp.ok:
+                        analysis_data = job["result"]
                         score = analysis_data['score']
                         missing = analysis_data['missing']
 
@@ -275,6 +312,33 @@ def student_page():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+@st.cache_data(ttl=ADMIN_CACHE_TTL, show_spinner=False)
+def fetch_admin_summary(top_k=5):
+    resp = requests.get(f"{API_BASE}/admin/summary", params={"k": top_k}, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
+@st.cache_data(ttl=ADMIN_CACHE_TTL, show_spinner=False)
+def fetch_applications(before_id=None, limit=ADMIN_PAGE_SIZE):
+    params = {"limit": limit}
+    if before_id is not None:
+        params["before_id"] = before_id
+    resp = requests.get(f"{API_BASE}/admin/applications", params=params, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
+@st.cache_data(ttl=ADMIN_CACHE_TTL, show_spinner=False)
+def search_resumes(query, verdict=None, advanced=False, limit=ADMIN_PAGE_SIZE):
+    params = {"q": query, "limit": limit, "advanced": advanced}
+    if verdict is not None:
+        params["verdict"] = verdict
+    resp = requests.get(f"{API_BASE}/search", params=params, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
+
+
 def admin_page():
     st.markdown('<div class="header">Admin Dashboard</div>', unsafe_allow_html=True)
     st.sidebar.markdown(f"### Welcome, **{st.session_state.user}** 👋")
@@ -287,48 +351,26 @@ def admin_page():
         st.session_state.app_state = "post_jd"
         st.rerun()
 
-    db_path = "outputs/resume_system.db"
-    if not os.path.exists(db_path):
-        st.error("Database file not found. Make sure the API is running.")
+    # Aggregates and pages come from the API, which reads precomputed daily
+    # stats and indexed keyset pages, so each rerun fetches a few rows however
+    # large the resumes table is.
+    cursors = st.session_state.setdefault("admin_cursors", [None])
+    try:
+        summary = fetch_admin_summary()
+        applications = fetch_applications(cursors[-1])
+    except requests.RequestException as e:
+        st.error(f"Could not load dashboard data. Make sure the API is running. ({e})")
         return
 
-    conn = sqlite3.connect(db_path)
-    resumes_df = pd.read_sql_query(
-        "SELECT student_name, file_path, relevance_score, verdict, created_at FROM resumes",
-        conn,
-    )
-    jds_df = pd.read_sql_query(
-        "SELECT jd_file, role, created_at FROM jobs",
-        conn,
-    )
-    conn.close()
-
-    if not resumes_df.empty:
-        resumes_df["created_at"] = pd.to_datetime(resumes_df["created_at"], errors="coerce")
-        resumes_df["relevance_score"] = pd.to_numeric(resumes_df["relevance_score"], errors="coerce")
-    if not jds_df.empty:
-        jds_df["created_at"] = pd.to_datetime(jds_df["created_at"], errors="coerce")
-
-    today = date.today()
-    jd_today = int((jds_df["created_at"].dt.date == today).sum()) if not jds_df.empty else 0
-    jd_total = len(jds_df)
-
-    resumes_today_df = resumes_df[resumes_df["created_at"].dt.date == today] if not resumes_df.empty else pd.DataFrame()
-    resumes_today_count = len(resumes_today_df)
-    resumes_total = len(resumes_df)
-
-    avg_score_today = float(resumes_today_df["relevance_score"].mean()) if not resumes_today_df.empty else 0.0
-    avg_score_total = float(resumes_df["relevance_score"].mean()) if not resumes_df.empty else 0.0
-
     st.markdown('<div class="card"><h3>Today\'s Activity</h3></div>', unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
-    col1.metric("JDs Uploaded Today", jd_today, delta=f"Total: {jd_total}")
-    col2.metric("Resumes Submitted Today", resumes_today_count, delta=f"Total: {resumes_total}")
-    col3.metric("Average Score Today", f"{avg_score_today:.2f}%", delta=f"Overall: {avg_score_total:.2f}%")
+    col1.metric("JDs Uploaded Today", summary["jds_today"], delta=f"Total: {summary['jds_total']}")
+    col2.metric("Resumes Submitted Today", summary["resumes_today"], delta=f"Total: {summary['resumes_total']}")
+    col3.metric("Average Score Today", f"{summary['avg_score_today']:.2f}%", delta=f"Overall: {summary['avg_score_total']:.2f}%")
 
-    if not resumes_df.empty:
+    if summary["resumes_total"]:
         st.markdown('<div class="card"><h3>🏆 Top 5 Resumes by Score</h3></div>', unsafe_allow_html=True)
-        top5 = resumes_df.nlargest(5, "relevance_score").copy()
+        top5 = pd.DataFrame(summary["top"], columns=["student_name", "file_path", "relevance_score", "verdict"])
         top5["Resume"] = top5["file_path"].apply(os.path.basename)
 
         fig = px.pie(
@@ -353,8 +395,11 @@ def admin_page():
         )
         st.plotly_chart(fig, use_container_width=True)
 
-        st.markdown('<div class="card"><h3>📋 All Resume Applications (Top 20)</h3></div>', unsafe_allow_html=True)
-        display = resumes_df.head(20).rename(
+        st.markdown('<div class="card"><h3>📋 All Resume Applications</h3></div>', unsafe_allow_html=True)
+        page = pd.DataFrame(
+            applications["items"], columns=["student_name", "file_path", "relevance_score", "verdict", "created_at"]
+        )
+        display = page.rename(
             columns={
                 "student_name": "Student",
                 "file_path": "Resume Path",
@@ -364,6 +409,37 @@ def admin_page():
             }
         )
         st.dataframe(display, use_container_width=True)
+
+        prev_col, next_col = st.columns(2)
+        if prev_col.button("← Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if next_col.button("Older →", disabled=applications["next_before_id"] is None):
+            cursors.append(applications["next_before_id"])
+            st.rerun()
+
+        csv_col, parquet_col = st.columns(2)
+        csv_col.link_button("Export all as CSV", f"{API_PUBLIC_BASE}/export?format=csv")
+        parquet_col.link_button("Export all as Parquet", f"{API_PUBLIC_BASE}/export?format=parquet")
+
+        st.markdown('<div class="card"><h3>🔎 Search Resumes</h3></div>', unsafe_allow_html=True)
+        query = st.text_input("Search resume text", placeholder="e.g. kafka spark, c++, pyth*")
+        advanced = st.checkbox("Advanced syntax (AND / OR / NOT, \"phrases\", NEAR)")
+        verdict = st.selectbox("Verdict", ["Any", "Strong Match", "Moderate Match", "Weak Match"])
+        if query.strip():
+            try:
+                hits = search_resumes(query, None if verdict == "Any" else verdict, advanced)
+            except requests.HTTPError as e:
+                st.warning(e.response.json().get("detail", "Invalid search query."))
+            else:
+                if not hits["items"]:
+                    st.info("No resumes match this search.")
+                for hit in hits["items"]:
+                    snippet = hit["snippet"].replace("<mark>", "**").replace("</mark>", "**")
+                    st.markdown(
+                        f"**{hit['student_name']}** · {hit['jd_file'] or '-'} · {hit['verdict'] or '-'} "
+                        f"({(hit['relevance_score'] or 0):.2f}%)  \n{snippet}"
+                    )
     else:
         st.info("No applications found in the database yet.")
 
@@ -393,7 +469,11 @@ def post_jd_page():
                     resp = requests.post(f"{API_BASE}/upload_jd", data=data, files=files, timeout=120)
                 
                 if resp.ok:
-                    st.success(f"✅ Job Description for '{job_role}' has been posted!")
+                    fetch_jds.clear()
+                    posted = resp.json()
+                    st.success(f"✅ Job Description for '{job_role}' has been posted (revision {posted['revision']})!")
+                    if posted["rescoring"]:
+                        st.info("Existing applicants to this posting are being re-scored against the new revision.")
                 else:
                     st.error(f"Error posting job: {resp.text}")
             except Exception as e:
@@ -1,15 +1,40 @@
 import os
-from fastapi import FastAPI, UploadFile, File, Form
+from typing import List, Optional
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_db, get_conn
-from scoring import score_resume
+from database import init_db, get_conn, insert_resumes, find_scored_resume, record_application, daily_summary, top_resumes, list_applications
+from scoring import analyze_resume, analyze_batch, scoring_version
+from jd_artifacts import get_jd_artifact
+from extraction import file_sha256, cache_stats
+from starlette.concurrency import run_in_threadpool
+import metrics
+import embedding_index
+import embedding_service
+import export
+import recommend
+import rescore
+import revisions
+import search
+import uploads
+import job_queue
+import models
+import queue
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from pathlib import Path
-import shutil
 import sqlite3
 
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+MAX_PAGE_SIZE = 200
+
 app = FastAPI()
 init_db()
 
+if models.MODEL_WARMUP == "preload":
+    models.preload()
+
 # --- CORRECTED THIS SECTION ---
 # Allow all origins for development/hackathon purposes
 origins = ["*"] # Use a wildcard for all origins
@@ -21,54 +46,426 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 # -----------------------------
+app.add_middleware(uploads.BodySizeLimit, paths=["/upload_jd", "/upload_resume", "/recommend", "/score_batch"])
 
 Path("data/resumes").mkdir(parents=True, exist_ok=True)
 Path("data/jds").mkdir(parents=True, exist_ok=True)
 
+@app.on_event("startup")
+def start_scoring_workers():
+    if models.MODEL_WARMUP == "startup":
+        models.warm_up()
+    job_queue.start(_score_and_store)
+    revisions.resume_pending()
+
+@app.on_event("startup")
+async def size_upload_threads():
+    uploads.configure_io_threads()
+
+@app.on_event("shutdown")
+def stop_scoring_workers():
+    job_queue.stop()
+
+metrics.gauge("scoring_jobs_pending", "Uploads waiting in the scoring queue.", job_queue.pending_count)
+metrics.gauge("embedding_queue_depth", "Texts waiting for the embedding micro-batcher.", lambda: embedding_service.stats()["queue_depth"])
+metrics.gauge("text_cache_bytes", "Bytes held by the extraction cache.", lambda: cache_stats()["bytes"])
+metrics.gauge("resume_index_size", "Resume embeddings in the similarity index.", embedding_index.size)
+metrics.gauge("scoring_cpu_queue_depth", "Requests waiting for a scoring CPU worker.", uploads.cpu_queue_depth)
+
+@app.middleware("http")
+async def record_request_timings(request: Request, call_next):
+    timings = metrics.start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    metrics.observe("http_request_seconds", elapsed, method=request.method, route=route.path if route else "unmatched")
+    if metrics.SERVER_TIMING:
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings, elapsed)
+    return response
+
+@app.exception_handler(queue.Full)
+@app.exception_handler(TimeoutError)
+def embedding_queue_full(request, exc):
+    # Backpressure from the embedding micro-batcher (queue full, or the
+    # embedding not ready in time): shed load instead of queueing without bound.
+    return JSONResponse(status_code=503, content={"detail": "Scoring is at capacity, retry shortly"}, headers={"Retry-After": "1"})
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-@app.post("/upload_jd")
-def upload_jd(role: str = Form(...), file: UploadFile = File(...)):
-    save_path = f"data/jds/{file.filename}"
-    with open(save_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/models")
+def model_stats():
+    return {**models.stats(), "embedding_service": embedding_service.stats()}
+
+@app.get("/cache_stats")
+def extraction_cache_stats():
+    return cache_stats()
+
+def _register_jd(role, jd_file, save_path, jd_hash):
+    # Build the JD-side artifact once here so resume scoring never re-parses the JD.
+    artifact = get_jd_artifact(save_path, jd_hash)
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO jobs(role, jd_file) VALUES(?, ?)", (role, file.filename))
-    conn.commit()
+    revision, content_changed = revisions.record_revision(conn, role, jd_file, artifact["hash"])
     conn.close()
-    return {"message": "JD uploaded", "role": role, "jd_file": file.filename}
+    if content_changed:
+        revisions.start(jd_file)
+    return revision, content_changed
+
+
+@app.post("/upload_jd")
+async def upload_jd(role: str = Form(...), file: UploadFile = File(...)):
+    # Only the base name is kept, so a crafted filename cannot write outside data/jds.
+    jd_file = os.path.basename((file.filename or "").replace("\\", "/"))
+    if jd_file in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail="Invalid JD filename")
+    save_path = f"data/jds/{jd_file}"
+    jd_hash, _ = await uploads.replace_upload(file, save_path)
+    revision, content_changed = await uploads.run_cpu(_register_jd, role, jd_file, save_path, jd_hash)
+    return {"message": "JD uploaded", "role": role, "jd_file": jd_file, "revision": revision, "rescoring": content_changed}
+
+def _http_date(timestamp):
+    return format_datetime(datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
 
 @app.get("/jds")
-def get_all_jds():
+def get_all_jds(request: Request, response: Response, before_id: Optional[int] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    """Open postings (latest revision of each JD file), newest first, keyset-paginated on id.
+
+    Jobs are append-only, so the newest id and the row count identify the
+    table's state: clients that send the ETag back get a 304 without the
+    listing query running.
+    """
     conn = get_conn()
-    jds = conn.execute("SELECT role, jd_file, created_at FROM jobs ORDER BY datetime(created_at) DESC").fetchall()
+    max_id, count, newest = conn.execute("SELECT MAX(id), COUNT(*), MAX(created_at) FROM jobs").fetchone()
+    etag = f'W/"jds-{max_id or 0}-{count}-{before_id or 0}-{limit}"'
+    last_modified = _http_date(newest) if newest else None
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if _not_modified(request, etag, last_modified):
+        conn.close()
+        return Response(status_code=304, headers=headers)
+
+    where, params = ("AND id < ?", [before_id]) if before_id is not None else ("", [])
+    rows = conn.execute(
+        "SELECT id, role, jd_file, created_at, revision FROM jobs "
+        f"WHERE id IN (SELECT MAX(id) FROM jobs GROUP BY jd_file) {where} ORDER BY id DESC LIMIT ?",
+        (*params, limit + 1),
+    ).fetchall()
     conn.close()
-    
-    # Format the data into a list of dictionaries
+
+    response.headers.update(headers)
     jds_list = [
-        {"role": row[0], "jd_file": row[1], "created_at": row[2]}
-        for row in jds
+        {"id": row[0], "role": row[1], "jd_file": row[2], "created_at": row[3], "revision": row[4]}
+        for row in rows[:limit]
     ]
-    return {"job_descriptions": jds_list}
+    return {"job_descriptions": jds_list, "next_before_id": jds_list[-1]["id"] if len(rows) > limit else None}
 
 
-@app.post("/upload_resume")
-def upload_resume(student_name: str = Form(...), jd_file: str = Form(...), file: UploadFile = File(...)):
-    save_path = f"data/resumes/{file.filename}"
-    with open(save_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+@app.get("/jds/{jd_file}/download")
+def download_jd(jd_file: str):
+    """Stream a posted JD file from disk; FileResponse sends it in chunks with its own ETag."""
+    conn = get_conn()
+    posted = conn.execute("SELECT 1 FROM jobs WHERE jd_file = ? LIMIT 1", (jd_file,)).fetchone()
+    conn.close()
+    jd_path = Path("data/jds") / jd_file
+    if posted is None or jd_path.name != jd_file or not jd_path.is_file():
+        raise HTTPException(status_code=404, detail="JD file not found")
+    return FileResponse(jd_path, filename=jd_file, media_type="application/octet-stream")
 
+
+@app.get("/jds/{jd_file}/revisions")
+def jd_revisions(jd_file: str):
+    """Revision history of a posting and how many of its applications still await re-scoring."""
+    conn = get_conn()
+    result = revisions.history(conn, jd_file)
+    conn.close()
+    if result is None:
+        raise HTTPException(status_code=404, detail="JD file not found")
+    return result
+
+
+def _jd_artifact_for(conn, jd_file):
+    if os.path.basename(jd_file) != jd_file or jd_file in ("", ".", ".."):
+        raise HTTPException(status_code=404, detail="JD file not found")
     jd_path = f"data/jds/{jd_file}"
-    score, verdict, missing = score_resume(save_path, jd_path)
+    row = conn.execute("SELECT jd_hash FROM jobs WHERE jd_file = ? ORDER BY id DESC LIMIT 1", (jd_file,)).fetchone()
+    try:
+        return get_jd_artifact(jd_path, row[0] if row else None)
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(status_code=404, detail="JD file not found")
+
+
+def _reuse_result(conn, scored_id, student_name, save_path, jd_file, original_filename):
+    """Record this student's application with the result of an identical, already-scored submission.
+
+    The same bytes from another student are a separate application: it gets
+    its own resumes row (and index entry) without running the models again.
+    Returns the new row's id, or None if this student already has it stored.
+    """
+    resume_id = record_application(conn, scored_id, student_name, save_path, jd_file, original_filename)
+    if resume_id is not None:
+        vector = embedding_index.vectors_for([scored_id]).get(scored_id)
+        if vector is not None:
+            embedding_index.append([resume_id], vector)
+    return resume_id
 
+
+def _score_and_store(student_name, save_path, jd_file, content_hash=None, original_filename=None):
+    content_hash = content_hash or file_sha256(save_path)
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("INSERT INTO resumes(student_name,file_path,jd_file,relevance_score,verdict) VALUES(?,?,?,?,?)",
-                 (student_name, save_path, jd_file, score, verdict))
-    conn.commit()
+    jd_artifact = _jd_artifact_for(conn, jd_file)
+
+    # Identical bytes already scored against the same JD with the same
+    # pipeline: return the stored payload without running the models.
+    version = scoring_version()
+    stored = find_scored_resume(conn, content_hash, jd_artifact["hash"], version)
+    if stored is not None:
+        _reuse_result(conn, stored["id"], student_name, save_path, jd_file, original_filename)
+        conn.close()
+        return {"score": stored["score"], "verdict": stored["verdict"], "missing": stored["missing"], "duplicate": True}
+
+    result = analyze_resume(save_path, jd_artifact, content_hash)
+    score, verdict, missing = result["score"], result["verdict"], result["missing"]
+
+    [resume_id] = insert_resumes(conn, [{
+        "student_name": student_name, "file_path": save_path, "jd_file": jd_file,
+        "relevance_score": score, "verdict": verdict, "original_filename": original_filename,
+        "content_hash": content_hash, "jd_content_hash": jd_artifact["hash"],
+        "scoring_version": version, "missing": missing, "text": result["text"], **result["components"],
+    }])
     conn.close()
+    if resume_id is not None:
+        embedding_index.append([resume_id], result["embedding"])
+
+    return {"score": score, "verdict": verdict, "missing": missing, "duplicate": resume_id is None}
+
 
-    return {"score": score, "verdict": verdict, "missing": missing}
+def _enqueue_upload(student_name, save_path, jd_file, content_hash, original_filename):
+    conn = get_conn()
+    stored = find_scored_resume(conn, content_hash, _jd_artifact_for(conn, jd_file)["hash"], scoring_version())
+    if stored is not None:
+        _reuse_result(conn, stored["id"], student_name, save_path, jd_file, original_filename)
+    conn.close()
+    if stored is not None:
+        result = {"score": stored["score"], "verdict": stored["verdict"], "missing": stored["missing"], "duplicate": True}
+        return {"job_id": None, "status": "done", "result": result}
+    job_id = job_queue.enqueue(student_name, save_path, jd_file, original_filename)
+    return {"job_id": job_id, "status": "pending"}
+
+
+@app.post("/upload_resume")
+async def upload_resume(student_name: str = Form(...), jd_file: str = Form(...), file: UploadFile = File(...), queued: bool = Form(False)):
+    save_path, content_hash = await uploads.store_upload(file, "data/resumes", file.filename)
+
+    # In queued mode the upload is only recorded; a scoring worker picks it up
+    # and the client polls /jobs/{job_id} for the result. Duplicates are
+    # answered straight away.
+    if queued:
+        return await run_in_threadpool(_enqueue_upload, student_name, save_path, jd_file, content_hash, file.filename)
+
+    return await uploads.run_cpu(_score_and_store, student_name, save_path, jd_file, content_hash, file.filename)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    job = job_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.post("/score_batch")
+async def score_batch_upload(jd_file: str = Form(...), batch_size: int = Form(32), files: List[UploadFile] = File(...)):
+    saved = []
+    for file in files:
+        if file.filename.lower().endswith(".zip"):
+            saved.extend(await uploads.store_zip_upload(file, "data/resumes", RESUME_EXTENSIONS))
+        else:
+            name = os.path.basename(file.filename)
+            saved.append((name, *await uploads.store_upload(file, "data/resumes", name)))
+    if not saved:
+        raise HTTPException(status_code=400, detail="No resumes found in upload")
+    return await uploads.run_cpu(_score_batch, jd_file, saved, batch_size)
+
+
+def _score_batch(jd_file, saved, batch_size):
+    """Score (filename, path, hash) uploads against `jd_file`, reusing stored results for files already scored."""
+    conn = get_conn()
+    jd_artifact = _jd_artifact_for(conn, jd_file)
+    version = scoring_version()
+
+    # Files already scored against this JD with this pipeline are answered
+    # from the stored row; only the rest (each distinct file once) are analyzed.
+    stored = {}
+    for _, _, content_hash in saved:
+        if content_hash not in stored:
+            stored[content_hash] = find_scored_resume(conn, content_hash, jd_artifact["hash"], version)
+    misses = {}
+    for name, path, content_hash in saved:
+        if stored[content_hash] is None:
+            misses.setdefault(content_hash, (name, path))
+    analyzed = dict(zip(misses, analyze_batch([path for _, path in misses.values()], jd_artifact, batch_size=batch_size)))
+
+    rows = [
+        {
+            "student_name": Path(misses[content_hash][0]).stem, "file_path": misses[content_hash][1], "jd_file": jd_file,
+            "relevance_score": result["score"], "verdict": result["verdict"], "original_filename": misses[content_hash][0],
+            "content_hash": content_hash, "jd_content_hash": jd_artifact["hash"],
+            "scoring_version": version, "missing": result["missing"], "text": result["text"], **result["components"],
+        }
+        for content_hash, result in analyzed.items()
+    ]
+    resume_ids = dict(zip(analyzed, insert_resumes(conn, rows)))
+    new = [(resume_id, analyzed[content_hash]["embedding"]) for content_hash, resume_id in resume_ids.items() if resume_id is not None]
+    embedding_index.append([resume_id for resume_id, _ in new], [emb for _, emb in new])
+
+    # Every other file is an application of its own (keyed by student name)
+    # that reuses the result scored above or stored earlier.
+    results = []
+    first = {content_hash: misses[content_hash][1] for content_hash in analyzed}
+    for name, path, content_hash in saved:
+        student_name = Path(name).stem
+        if stored[content_hash] is not None:
+            source = stored[content_hash]
+            resume_id = _reuse_result(conn, source["id"], student_name, path, jd_file, name)
+            reused = True
+        else:
+            source = analyzed[content_hash]
+            resume_id = resume_ids[content_hash]
+            reused = first.pop(content_hash, None) != path
+            if reused and resume_id is not None:
+                resume_id = _reuse_result(conn, resume_id, student_name, path, jd_file, name)
+        results.append({
+            "student_name": student_name, "file_path": path, "id": resume_id, "score": source["score"], "verdict": source["verdict"],
+            "missing": source["missing"], "duplicate": reused or resume_id is None,
+        })
+    conn.close()
+    return {"jd_file": jd_file, "count": len(results), "results": results}
+
+
+@app.post("/recommend")
+async def recommend_jobs(file: UploadFile = File(...), limit: int = Form(10, ge=1, le=MAX_PAGE_SIZE)):
+    """Score one resume against every open posting and return the postings ranked by fit."""
+    save_path, content_hash = await uploads.store_upload(file, "data/resumes", file.filename)
+    return {"results": await uploads.run_cpu(recommend.recommend, save_path, content_hash, limit)}
+
+
+@app.post("/rescore")
+def rescore_all():
+    """Recompute every stored score and verdict from saved components using the current weights."""
+    conn = get_conn()
+    updated = rescore.rescore(conn)
+    conn.close()
+    return {"rescored": updated, "weights": rescore.current_weights()}
+
+
+@app.get("/rescore")
+def last_rescore():
+    """Weights and thresholds applied by the most recent rescore run."""
+    conn = get_conn()
+    run = rescore.last_run(conn)
+    conn.close()
+    if run is None:
+        raise HTTPException(status_code=404, detail="No rescore has run yet")
+    return run
+
+
+@app.get("/rank")
+def rank_resumes(jd_file: str, k: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """Rank every indexed resume against a JD by embedding similarity."""
+    conn = get_conn()
+    jd_artifact = _jd_artifact_for(conn, jd_file)
+    hits = embedding_index.top_k(jd_artifact["embedding"], k)
+
+    details = {}
+    if hits:
+        placeholders = ",".join("?" * len(hits))
+        for row in conn.execute(
+            f"SELECT id, student_name, file_path, jd_file, relevance_score, verdict FROM resumes WHERE id IN ({placeholders})",
+            [resume_id for resume_id, _ in hits],
+        ):
+            details[row[0]] = {
+                "student_name": row[1], "file_path": row[2], "applied_jd_file": row[3],
+                "relevance_score": row[4], "verdict": row[5],
+            }
+    conn.close()
+
+    return {
+        "jd_file": jd_file,
+        "indexed": embedding_index.size(),
+        "results": [
+            {"id": resume_id, "similarity": similarity, **details.get(resume_id, {})}
+            for resume_id, similarity in hits
+        ],
+    }
+
+
+@app.get("/admin/summary")
+def admin_summary(day: Optional[str] = None, k: int = Query(5, ge=1, le=MAX_PAGE_SIZE)):
+    """Today's and all-time counts and averages plus the top-k scores, read from precomputed daily stats."""
+    day = day or datetime.now(timezone.utc).date().isoformat()
+    conn = get_conn()
+    summary = daily_summary(conn, day)
+    summary["top"] = top_resumes(conn, k)
+    conn.close()
+    return summary
+
+
+@app.get("/admin/applications")
+def admin_applications(before_id: Optional[int] = None, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """Newest-first applications, one keyset page at a time."""
+    conn = get_conn()
+    page = list_applications(conn, before_id, limit)
+    conn.close()
+    return page
+
+
+@app.get("/export")
+def export_applications(format: str = "csv", start: Optional[str] = None, end: Optional[str] = None,
+                        jd_file: Optional[str] = None, verdict: Optional[str] = None):
+    """Stream every matching application with its role as CSV, NDJSON or Parquet, one chunk of rows at a time."""
+    if format not in export.available_formats():
+        raise HTTPException(status_code=400, detail=f"Unsupported format {format!r}; available: {', '.join(export.available_formats())}")
+    try:
+        row_chunks = export.chunks(start, end, jd_file, verdict)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = f"applications.{format}"
+    return StreamingResponse(
+        export.encode(format, row_chunks), media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/search")
+def search_resumes(q: str, jd_file: Optional[str] = None, verdict: Optional[str] = None, min_score: Optional[float] = None,
+                   max_score: Optional[float] = None, after: Optional[str] = None, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+                   advanced: bool = False):
+    """Full-text search over resume text, BM25-ranked with highlighted snippets; advanced=true takes FTS5 query syntax."""
+    conn = get_conn()
+    try:
+        return search.search(conn, q, jd_file, verdict, min_score, max_score, after, limit, advanced)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        conn.close()
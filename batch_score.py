@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import embedding_index
+from database import init_db, get_conn, insert_resumes, find_scored_resume, record_application
+from jd_artifacts import get_jd_artifact
+from extraction import file_sha256
+from scoring import analyze_batch, scoring_version
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every resume in a directory against one JD.")
+    parser.add_argument("resume_dir", help="Directory of resumes, e.g. data/resumes")
+    parser.add_argument("--jd", required=True, help="Path to the JD file, e.g. data/jds/sample_jd.pdf")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--save", action="store_true", help="Insert the results into the resumes table")
+    args = parser.parse_args()
+
+    paths = sorted(
+        str(path) for path in Path(args.resume_dir).iterdir()
+        if path.is_file() and path.name.lower().endswith(RESUME_EXTENSIONS)
+    )
+    jd_artifact = get_jd_artifact(args.jd)
+    jd_file = os.path.basename(args.jd)
+    version = scoring_version()
+    hashes = [file_sha256(path) for path in paths]
+
+    # Resumes already scored against this JD with this pipeline come from the
+    # database; only the rest go through inference.
+    init_db()
+    conn = get_conn()
+    stored = [find_scored_resume(conn, content_hash, jd_artifact["hash"], version) for content_hash in hashes]
+    conn.close()
+    misses = [i for i, hit in enumerate(stored) if hit is None]
+    results = analyze_batch([paths[i] for i in misses], jd_artifact, batch_size=args.batch_size)
+
+    rows = [
+        {
+            "student_name": Path(paths[i]).stem, "file_path": paths[i], "jd_file": jd_file,
+            "relevance_score": result["score"], "verdict": result["verdict"], "original_filename": os.path.basename(paths[i]),
+            "content_hash": hashes[i], "jd_content_hash": jd_artifact["hash"],
+            "scoring_version": version, "missing": result["missing"], "text": result["text"], **result["components"],
+        }
+        for i, result in zip(misses, results)
+    ]
+    if args.save:
+        conn = get_conn()
+        resume_ids = insert_resumes(conn, rows)
+        new = [(resume_id, result["embedding"]) for resume_id, result in zip(resume_ids, results) if resume_id is not None]
+        # A stored result for another student's identical file is still this student's application.
+        vectors = embedding_index.vectors_for([hit["id"] for hit in stored if hit is not None])
+        for i, hit in enumerate(stored):
+            if hit is not None:
+                resume_id = record_application(conn, hit["id"], Path(paths[i]).stem, paths[i], jd_file, os.path.basename(paths[i]))
+                if resume_id is not None and hit["id"] in vectors:
+                    new.append((resume_id, vectors[hit["id"]]))
+        conn.close()
+        embedding_index.append([resume_id for resume_id, _ in new], [emb for _, emb in new])
+
+    scored = {i: (result["score"], result["verdict"], result["missing"]) for i, result in zip(misses, results)}
+    for i, path in enumerate(paths):
+        score, verdict, missing = scored[i] if stored[i] is None else (stored[i]["score"], stored[i]["verdict"], stored[i]["missing"])
+        print(json.dumps({"student_name": Path(path).stem, "file_path": path, "score": round(score, 2), "verdict": verdict, "missing": missing}))
+
+
+if __name__ == "__main__":
+    main()
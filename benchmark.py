@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import requests
+
+# Reproducible benchmarks over the bundled sample corpus (data/resumes,
+# data/jds). Everything runs in a scratch working directory so the repo's
+# database and caches are neither read nor modified, and the extraction cache
+# is disabled so every measurement pays for real extraction. Results are JSON;
+# pass --baseline to compare against a previous run and flag regressions.
+REPO_DIR = Path(__file__).resolve().parent
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def _percentiles(samples_seconds):
+    ms = np.asarray(samples_seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def _timed(fn, items, repeat):
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            started = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_in_process(resume_paths, jd_path, repeat, batch_size):
+    import extraction
+    import scoring
+    from jd_artifacts import get_jd_artifact
+    from models import get_embed_model
+
+    results = {}
+    file_bytes = sum(os.path.getsize(path) for path in resume_paths)
+
+    # main() sets TEXT_CACHE_MAX_BYTES=0 before extraction is imported, so
+    # extract_text re-extracts every time.
+    samples = _timed(extraction.extract_text, resume_paths, repeat)
+    results["extract_text"] = {
+        **_percentiles(samples),
+        "docs_per_s": round(len(samples) / sum(samples), 2),
+        "mb_per_s": round(file_bytes * repeat / sum(samples) / 1e6, 3),
+    }
+
+    texts = [extraction.extract_text(path) for path in resume_paths]
+    scoring.lexical_analysis(texts[0])  # load spaCy and compile the taxonomy outside the timings
+    samples = _timed(scoring.lexical_tokens, texts, repeat)
+    results["tokenize"] = {**_percentiles(samples), "docs_per_s": round(len(samples) / sum(samples), 2)}
+    samples = _timed(scoring.lexical_analysis, texts, repeat)
+    results["lexical_analysis"] = {**_percentiles(samples), "docs_per_s": round(len(samples) / sum(samples), 2)}
+
+    model = get_embed_model()
+    model.encode(texts[:1], convert_to_numpy=True)
+    samples = _timed(lambda text: model.encode(text, convert_to_numpy=True), texts, repeat)
+    results["embed_single"] = {**_percentiles(samples), "docs_per_s": round(len(samples) / sum(samples), 2)}
+    started = time.perf_counter()
+    for _ in range(repeat):
+        model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    elapsed = time.perf_counter() - started
+    results["embed_batched"] = {"docs_per_s": round(len(texts) * repeat / elapsed, 2), "batch_size": batch_size}
+
+    jd_artifact = get_jd_artifact(jd_path)
+    samples = _timed(lambda path: scoring.score_resume(path, jd_artifact), resume_paths, repeat)
+    results["score_resume"] = {**_percentiles(samples), "docs_per_s": round(len(samples) / sum(samples), 2)}
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        scoring.analyze_batch(resume_paths, jd_artifact, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    results["analyze_batch"] = {"docs_per_s": round(len(resume_paths) * repeat / elapsed, 2)}
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_app(workdir, port, env):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode} during startup")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("App did not become healthy within 300 s")
+
+
+def bench_http(url, resume_paths, jd_path, concurrency_levels, requests_per_level):
+    with open(jd_path, "rb") as f:
+        requests.post(f"{url}/upload_jd", data={"role": "Benchmark"}, files={"file": (jd_path.name, f)}, timeout=600).raise_for_status()
+    payloads = [(path.name, path.read_bytes()) for path in resume_paths]
+    counter = iter(range(10**9))
+
+    def upload(_):
+        name, data = payloads[next(counter) % len(payloads)]
+        # A unique trailer gives every request new content (PDF readers ignore
+        # bytes after %%EOF), so dedup and the text cache never short-circuit it.
+        data += f"\n%benchmark-{time.time_ns()}\n".encode()
+        started = time.perf_counter()
+        resp = requests.post(
+            f"{url}/upload_resume",
+            data={"student_name": "benchmark", "jd_file": jd_path.name},
+            files={"file": (name, data)},
+            timeout=600,
+        )
+        return time.perf_counter() - started, resp.status_code
+
+    upload(None)  # first request pays model loading if warm-up is off
+    results = {}
+    for concurrency in concurrency_levels:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(upload, range(requests_per_level)))
+        elapsed = time.perf_counter() - started
+        ok = [seconds for seconds, status in outcomes if status == 200]
+        results[f"upload_resume_c{concurrency}"] = {
+            **(_percentiles(ok) if ok else {}),
+            "requests_per_s": round(len(ok) / elapsed, 2),
+            "errors": len(outcomes) - len(ok),
+        }
+    return results
+
+
+# (metric, field) -> whether higher is better. Only these are compared against a baseline.
+TRACKED = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "docs_per_s": True, "requests_per_s": True, "mb_per_s": True}
+
+
+def compare(current, baseline, threshold):
+    """Per-metric relative change against a baseline run; entries worse than `threshold` are regressions."""
+    changes, regressions = {}, []
+    for name, fields in current["results"].items():
+        for field, value in fields.items():
+            before = baseline.get("results", {}).get(name, {}).get(field)
+            if field not in TRACKED or not before:
+                continue
+            change = (value - before) / before
+            worse = -change if TRACKED[field] else change
+            changes[f"{name}.{field}"] = {"baseline": before, "current": value, "change_pct": round(change * 100, 2)}
+            if worse > threshold:
+                regressions.append(f"{name}.{field}")
+    return {"baseline_created_at": baseline.get("created_at"), "threshold_pct": threshold * 100, "changes": changes, "regressions": regressions}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "-C", str(REPO_DIR), "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction, tokenization, embedding, scoring and /upload_resume.")
+    parser.add_argument("--resumes", default=str(REPO_DIR / "data/resumes"))
+    parser.add_argument("--jd", default=str(REPO_DIR / "data/jds/sample_jd.pdf"))
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus for in-process benchmarks")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=40, help="Uploads per concurrency level")
+    parser.add_argument("--skip-http", action="store_true", help="Only run the in-process benchmarks")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    resume_paths = sorted(
+        path.resolve() for path in Path(args.resumes).iterdir()
+        if path.is_file() and path.name.lower().endswith(RESUME_EXTENSIONS)
+    )
+    jd_path = Path(args.jd).resolve()
+    if not resume_paths:
+        parser.error(f"No resumes found in {args.resumes}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="resume-bench-"))
+    (workdir / "data/jds").mkdir(parents=True)
+    (workdir / "data/resumes").mkdir(parents=True)
+    shutil.copy(REPO_DIR / "data/taxonomy.json", workdir / "data/taxonomy.json")
+    shutil.copy(jd_path, workdir / "data/jds" / jd_path.name)
+    os.environ["TEXT_CACHE_MAX_BYTES"] = "0"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_DIR), os.environ.get("PYTHONPATH")]))}
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {"resumes": len(resume_paths), "jd": jd_path.name},
+        "config": {key: os.environ.get(key) for key in ("EMBED_BACKEND", "EMBED_CHUNKING", "EMBED_MICROBATCH", "SCORING_WORKERS", "SCORING_CPU_WORKERS", "FAKE_MODELS")},
+        "results": {},
+    }
+    try:
+        os.chdir(workdir)
+        sys.path.insert(0, str(REPO_DIR))
+        report["results"].update(bench_in_process([str(path) for path in resume_paths], str(workdir / "data/jds" / jd_path.name), args.repeat, args.batch_size))
+        if not args.skip_http:
+            process, url = _start_app(workdir, _free_port(), env)
+            try:
+                report["results"].update(bench_http(url, resume_paths, jd_path, args.concurrency, args.requests))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    regressions = report.get("comparison", {}).get("regressions", [])
+    for name in regressions:
+        change = report["comparison"]["changes"][name]
+        print(f"REGRESSION {name}: {change['baseline']} -> {change['current']} ({change['change_pct']:+.1f}%)", file=sys.stderr)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
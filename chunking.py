@@ -0,0 +1,187 @@
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+
+import embedding_service
+from database import get_conn, transaction
+from models import embed_model_id, get_embed_model
+
+# Chunked document embeddings. The embedding model only sees its first ~256
+# tokens, so a whole resume passed to encode() is scored on its first page and
+# the tail is tokenized for nothing. With EMBED_CHUNKING enabled, documents are
+# cut into chunks that fit the window: "section" packs consecutive résumé/JD
+# sections up to CHUNK_MAX_WORDS and windows any longer section, while
+# "window" slides a fixed window over the whole text. All chunks of a
+# document are encoded together and pooled into one normalized vector.
+# Chunk embeddings are cached in SQLite by the chunk text's hash, so a
+# re-uploaded JD with one edited section only re-encodes that section. The
+# cache holds at most CHUNK_CACHE_MAX_ROWS embeddings: past that the oldest are
+# evicted, down to 90% of the cap, and rows from another embedding model are
+# dropped the first time a process writes. CHUNK_CACHE_MAX_ROWS=0 turns it off.
+STRATEGY = os.environ.get("EMBED_CHUNKING", "none")
+STRATEGIES = ("none", "section", "window")
+MAX_WORDS = int(os.environ.get("CHUNK_MAX_WORDS", "180"))
+OVERLAP_WORDS = int(os.environ.get("CHUNK_OVERLAP_WORDS", "30"))
+MAX_CHUNKS = int(os.environ.get("CHUNK_MAX_CHUNKS", "32"))
+POOLING = os.environ.get("CHUNK_POOLING", "weighted")  # weighted | mean | max
+CACHE_MAX_ROWS = int(os.environ.get("CHUNK_CACHE_MAX_ROWS", "100000"))
+ENABLED = STRATEGY != "none"
+
+SECTION_HEADINGS = {
+    "summary", "profile", "professional summary", "objective", "career objective", "about", "about me",
+    "experience", "work experience", "professional experience", "employment", "employment history", "internships",
+    "education", "academic background", "qualifications", "skills", "technical skills", "key skills",
+    "projects", "academic projects", "certifications", "certificates", "achievements", "awards",
+    "publications", "responsibilities", "requirements", "preferred qualifications", "languages", "interests",
+}
+_HEADING_STRIP = re.compile(r"[\s:•\-–—|]+")
+
+_cache_lock = threading.Lock()
+_cache_rows = None
+
+
+def version():
+    """Identifies how document embeddings are built; folded into the scoring and artifact versions."""
+    if not ENABLED:
+        return "none"
+    return f"{STRATEGY}:{MAX_WORDS}:{OVERLAP_WORDS}:{MAX_CHUNKS}:{POOLING}"
+
+
+def _is_heading(line):
+    stripped = _HEADING_STRIP.sub(" ", line).strip()
+    if not stripped or len(stripped.split()) > 4:
+        return False
+    return stripped.lower() in SECTION_HEADINGS or (stripped.isupper() and any(c.isalpha() for c in stripped))
+
+
+def _windows(words):
+    step = max(MAX_WORDS - OVERLAP_WORDS, 1)
+    return [words[start:start + MAX_WORDS] for start in range(0, max(len(words) - OVERLAP_WORDS, 1), step)]
+
+
+def _sections(text):
+    sections, current = [], []
+    for line in text.splitlines():
+        if _is_heading(line) and current:
+            sections.append(current)
+            current = []
+        current.extend(line.split())
+    if current:
+        sections.append(current)
+    return sections
+
+
+def split(text):
+    """Chunk `text` with the configured strategy; returns at most CHUNK_MAX_CHUNKS strings."""
+    if STRATEGY == "window":
+        chunks = _windows(text.split())
+    elif STRATEGY == "section":
+        chunks, packed = [], []
+        for words in _sections(text):
+            if len(words) > MAX_WORDS:
+                if packed:
+                    chunks.append(packed)
+                    packed = []
+                chunks.extend(_windows(words))
+            elif len(packed) + len(words) > MAX_WORDS:
+                chunks.append(packed)
+                packed = list(words)
+            else:
+                packed.extend(words)
+        if packed:
+            chunks.append(packed)
+    else:
+        raise ValueError(f"Unknown EMBED_CHUNKING {STRATEGY!r}; expected one of {', '.join(STRATEGIES)}")
+    return [" ".join(words) for words in chunks[:MAX_CHUNKS] if words] or [text]
+
+
+def _chunk_hash(chunk):
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def _cached(conn, hashes, model):
+    found = {}
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), 500):
+        batch = unique[start:start + 500]
+        rows = conn.execute(
+            f"SELECT chunk_hash, embedding FROM chunk_embeddings WHERE model = ? AND chunk_hash IN ({','.join('?' * len(batch))})",
+            (model, *batch),
+        )
+        for chunk_hash, blob in rows:
+            found[chunk_hash] = np.frombuffer(blob, dtype=np.float32)
+    return found
+
+
+def _store(conn, model, vectors):
+    """Cache {chunk_hash: vector} for `model`, evicting the oldest rows once the cache is over CACHE_MAX_ROWS."""
+    global _cache_rows
+    with _cache_lock, transaction(conn):
+        if _cache_rows is None:
+            conn.execute("DELETE FROM chunk_embeddings WHERE model != ?", (model,))
+            _cache_rows = conn.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+        cur = conn.executemany(
+            "INSERT OR IGNORE INTO chunk_embeddings(chunk_hash, model, embedding) VALUES(?,?,?)",
+            [(chunk_hash, model, vector.tobytes()) for chunk_hash, vector in vectors.items()],
+        )
+        _cache_rows += cur.rowcount
+        if _cache_rows > CACHE_MAX_ROWS:
+            cur = conn.execute(
+                "DELETE FROM chunk_embeddings WHERE (chunk_hash, model) IN "
+                "(SELECT chunk_hash, model FROM chunk_embeddings ORDER BY created_at LIMIT ?)",
+                (_cache_rows - int(CACHE_MAX_ROWS * 0.9),),
+            )
+            _cache_rows -= cur.rowcount
+
+
+def _pool(vectors, weights):
+    if POOLING == "max":
+        pooled = vectors.max(axis=0)
+    elif POOLING == "mean":
+        pooled = vectors.mean(axis=0)
+    else:
+        pooled = np.average(vectors, axis=0, weights=weights)
+    return (pooled / max(float(np.linalg.norm(pooled)), 1e-12)).astype(np.float32)
+
+
+def embed_documents(texts, batch_size=None):
+    """One pooled, normalized float32 embedding per text.
+
+    Uncached chunks of every document are encoded together: in one batched
+    encode call when `batch_size` is given (bulk paths), otherwise through the
+    embedding micro-batcher so they share batches with concurrent requests.
+    """
+    chunked = [split(text) for text in texts]
+    hashes = [[_chunk_hash(chunk) for chunk in chunks] for chunks in chunked]
+    model = embed_model_id()
+
+    conn = get_conn()
+    known = _cached(conn, [h for doc in hashes for h in doc], model) if CACHE_MAX_ROWS > 0 else {}
+    missing = {}
+    for chunks, doc_hashes in zip(chunked, hashes):
+        for chunk, chunk_hash in zip(chunks, doc_hashes):
+            if chunk_hash not in known:
+                missing.setdefault(chunk_hash, chunk)
+    if missing:
+        if batch_size is None:
+            encoded = embedding_service.embed_many(list(missing.values()))
+        else:
+            encoded = get_embed_model().encode(
+                list(missing.values()), batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+            ).astype(np.float32)
+        known.update(zip(missing, encoded))
+        if CACHE_MAX_ROWS > 0:
+            _store(conn, model, {chunk_hash: known[chunk_hash] for chunk_hash in missing})
+    conn.close()
+
+    return [
+        _pool(np.stack([known[h] for h in doc_hashes]), [max(len(chunk.split()), 1) for chunk in chunks])
+        for chunks, doc_hashes in zip(chunked, hashes)
+    ]
+
+
+def embed_document(text):
+    return embed_documents([text])[0]
@@ -1,13 +1,123 @@
+import json
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+import metrics
+
 DB_PATH = "outputs/resume_system.db"
 Path("outputs").mkdir(exist_ok=True)
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-   
+# Connections are pooled per thread and tuned for a write-heavy workload with
+# concurrent dashboard reads: WAL lets readers proceed while a scoring write
+# commits, and synchronous=NORMAL is durable across application crashes.
+BUSY_TIMEOUT_SECONDS = 10
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    # Checkpoints (which fsync) run on a background thread instead of inside
+    # whichever request happens to push the WAL past its threshold.
+    "PRAGMA wal_autocheckpoint=0",
+)
+CHECKPOINT_INTERVAL_SECONDS = 5
+WRITE_BATCH_SIZE = 500
+
+_local = threading.local()
+# Writers in this process queue on a mutex instead of colliding inside SQLite,
+# whose busy handler backs off in coarse sleeps (up to 100 ms per retry).
+_write_lock = threading.Lock()
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+class PooledConnection(sqlite3.Connection):
+    def close(self):
+        # The connection stays open for the next caller on this thread;
+        # "closing" only discards anything left uncommitted.
+        if self.in_transaction:
+            self.rollback()
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_SECONDS, factory=PooledConnection)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _checkpoint_loop():
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_SECONDS)
+    while True:
+        time.sleep(CHECKPOINT_INTERVAL_SECONDS)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except sqlite3.Error:
+            pass
+
+def _start_checkpointer():
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = threading.Thread(target=_checkpoint_loop, name="sqlite-checkpointer", daemon=True)
+            _checkpointer.start()
+
+def _reset_pool():
+    global _local, _write_lock, _checkpointer, _checkpointer_lock
+    _local = threading.local()
+    _write_lock = threading.Lock()
+    _checkpointer = None
+    _checkpointer_lock = threading.Lock()
+
+# A forked worker (gunicorn preload) must never reuse the parent's handles.
+os.register_at_fork(after_in_child=_reset_pool)
+
+def get_conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
+        if _checkpointer is None:
+            _start_checkpointer()
+    return conn
+
+@contextmanager
+def transaction(conn=None):
+    """Write transaction on this thread's connection, serialized with other writers in the process."""
+    conn = conn or get_conn()
+    with metrics.timer("db_write"), _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+def write_many(sql, rows, batch_size=WRITE_BATCH_SIZE):
+    """Run `sql` for every row with executemany, committing once per batch."""
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with transaction() as conn:
+                conn.executemany(sql, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        with transaction() as conn:
+            conn.executemany(sql, batch)
+        written += len(batch)
+    return written
+
+def _ensure_column(cur, table, column, decl):
+    columns = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def _migration_1(cur):
     cur.execute("""
         CREATE TABLE IF NOT EXISTS jobs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -16,7 +126,6 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    
     cur.execute("""
         CREATE TABLE IF NOT EXISTS resumes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -28,7 +137,6 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
- 
     cur.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -37,11 +145,336 @@ def init_db():
             password TEXT
         )
     """)
-    conn.commit()
-    conn.close()
 
-def get_conn():
-    return sqlite3.connect(DB_PATH)
+def _migration_2(cur):
+    _ensure_column(cur, "jobs", "jd_hash", "TEXT")
+
+def _migration_3(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS jobs_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT,
+            file_path TEXT,
+            jd_file TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            result TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue_status ON jobs_queue(status, id)")
+
+def _migration_4(cur):
+    _ensure_column(cur, "resumes", "original_filename", "TEXT")
+    _ensure_column(cur, "resumes", "content_hash", "TEXT")
+    _ensure_column(cur, "resumes", "jd_content_hash", "TEXT")
+    _ensure_column(cur, "resumes", "scoring_version", "TEXT")
+    _ensure_column(cur, "resumes", "missing", "TEXT")
+    _ensure_column(cur, "jobs_queue", "original_filename", "TEXT")
+    # One stored result per (resume bytes, JD bytes, scoring pipeline); rows
+    # from before content hashing have NULLs and are not constrained.
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_resumes_dedup
+        ON resumes(content_hash, jd_content_hash, scoring_version)
+    """)
+
+def _migration_5(cur):
+    # Raw, unweighted score components; relevance_score and verdict are
+    # derived from them and can be recomputed in bulk by rescore.py.
+    _ensure_column(cur, "resumes", "keyword_overlap", "REAL")
+    _ensure_column(cur, "resumes", "similarity", "REAL")
+    _ensure_column(cur, "resumes", "content_coverage", "REAL")
+
+def _migration_6(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_resumes_jd_file ON resumes(jd_file)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_resumes_created_at ON resumes(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_jd_file ON jobs(jd_file, id)")
+
+def _migration_7(cur):
+    # Per-day counters kept current by triggers, so the admin dashboard reads
+    # a handful of summary rows instead of aggregating the whole resumes table.
+    # Days are UTC, matching CURRENT_TIMESTAMP.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT PRIMARY KEY,
+            resumes INTEGER NOT NULL DEFAULT 0,
+            scored INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            jds INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_resume_insert AFTER INSERT ON resumes BEGIN
+            INSERT OR IGNORE INTO daily_stats(day) VALUES (date(NEW.created_at));
+            UPDATE daily_stats
+            SET resumes = resumes + 1,
+                scored = scored + (NEW.relevance_score IS NOT NULL),
+                score_sum = score_sum + COALESCE(NEW.relevance_score, 0)
+            WHERE day = date(NEW.created_at);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_resume_update AFTER UPDATE OF relevance_score ON resumes BEGIN
+            UPDATE daily_stats
+            SET scored = scored + (NEW.relevance_score IS NOT NULL) - (OLD.relevance_score IS NOT NULL),
+                score_sum = score_sum + COALESCE(NEW.relevance_score, 0) - COALESCE(OLD.relevance_score, 0)
+            WHERE day = date(OLD.created_at);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_resume_delete AFTER DELETE ON resumes BEGIN
+            UPDATE daily_stats
+            SET resumes = resumes - 1,
+                scored = scored - (OLD.relevance_score IS NOT NULL),
+                score_sum = score_sum - COALESCE(OLD.relevance_score, 0)
+            WHERE day = date(OLD.created_at);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_job_insert AFTER INSERT ON jobs BEGIN
+            INSERT OR IGNORE INTO daily_stats(day) VALUES (date(NEW.created_at));
+            UPDATE daily_stats SET jds = jds + 1 WHERE day = date(NEW.created_at);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_job_delete AFTER DELETE ON jobs BEGIN
+            UPDATE daily_stats SET jds = jds - 1 WHERE day = date(OLD.created_at);
+        END
+    """)
+    cur.execute("DELETE FROM daily_stats")
+    cur.execute("""
+        INSERT INTO daily_stats(day, resumes, scored, score_sum)
+        SELECT date(created_at), COUNT(*), COUNT(relevance_score), COALESCE(SUM(relevance_score), 0)
+        FROM resumes GROUP BY date(created_at)
+    """)
+    cur.execute("""
+        INSERT INTO daily_stats(day, jds)
+        SELECT date(created_at), COUNT(*) FROM jobs WHERE true GROUP BY date(created_at)
+        ON CONFLICT(day) DO UPDATE SET jds = excluded.jds
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_resumes_score ON resumes(relevance_score, id)")
+
+def _migration_8(cur):
+    # Chunk embeddings keyed by the chunk text's hash and the embedding model
+    # id; see chunking.py.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_embeddings (
+            chunk_hash TEXT NOT NULL,
+            model TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (chunk_hash, model)
+        ) WITHOUT ROWID
+    """)
+
+def _migration_9(cur):
+    # Extracted resume text, stored once per content hash, with an FTS5 index
+    # over it (external content, so the text is not stored twice). Triggers
+    # keep the index in step with resume_texts; see search.py.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resume_texts (
+            id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL UNIQUE,
+            text TEXT NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS resume_fts USING fts5(
+            text, content='resume_texts', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+        )
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_resume_texts_insert AFTER INSERT ON resume_texts BEGIN
+            INSERT INTO resume_fts(rowid, text) VALUES (NEW.id, NEW.text);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_resume_texts_delete AFTER DELETE ON resume_texts BEGIN
+            INSERT INTO resume_fts(resume_fts, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_resume_texts_update AFTER UPDATE OF text ON resume_texts BEGIN
+            INSERT INTO resume_fts(resume_fts, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+            INSERT INTO resume_fts(rowid, text) VALUES (NEW.id, NEW.text);
+        END
+    """)
+
+def _migration_10(cur):
+    # Every jobs row is one revision of a posting (jd_file), numbered from 1.
+    # rescored_at stays NULL until the applications to a new revision have
+    # been re-scored against it; see revisions.py. Existing rows are taken as
+    # already settled.
+    _ensure_column(cur, "jobs", "revision", "INTEGER")
+    _ensure_column(cur, "jobs", "rescored_at", "TIMESTAMP")
+    cur.execute("""
+        UPDATE jobs SET
+            revision = (SELECT COUNT(*) FROM jobs j WHERE j.jd_file IS jobs.jd_file AND j.id <= jobs.id),
+            rescored_at = created_at
+    """)
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_revision ON jobs(jd_file, revision)")
+
+def _migration_11(cur):
+    # JD hash a row could not be re-scored against (its text failed to
+    # extract, or another row for the same resume already holds that
+    # revision), so re-scoring passes and the pending count leave it alone.
+    _ensure_column(cur, "resumes", "rescore_skipped_for", "TEXT")
+
+def _migration_12(cur):
+    # Lease on a running queue job: when it was claimed and by which process.
+    # A job whose lease has expired is claimed again; see job_queue.py.
+    _ensure_column(cur, "jobs_queue", "claimed_at", "TIMESTAMP")
+    _ensure_column(cur, "jobs_queue", "claimed_by", "INTEGER")
+
+def _migration_13(cur):
+    # One row per rescore.py run: the weights and thresholds it applied to
+    # the stored components, and how many results it updated.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS rescore_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            weights TEXT NOT NULL,
+            updated INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def _migration_14(cur):
+    # Dedup per applicant: the same bytes from another student are a separate
+    # application (scored once, see record_application), while a student
+    # resubmitting the same file is still one row.
+    cur.execute("DROP INDEX IF EXISTS idx_resumes_dedup")
+    cur.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_resumes_dedup
+        ON resumes(content_hash, jd_content_hash, scoring_version, student_name)
+    """)
+
+def _migration_15(cur):
+    # chunking.py evicts the oldest chunk embeddings once the cache is full.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_chunk_embeddings_created ON chunk_embeddings(created_at)")
+
+# Applied in order; PRAGMA user_version records the last one that ran. Append
+# new migrations at the end and never edit one that has shipped. The early
+# steps are idempotent so databases created before versioning upgrade cleanly.
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4, _migration_5, _migration_6, _migration_7, _migration_8, _migration_9, _migration_10, _migration_11, _migration_12, _migration_13, _migration_14, _migration_15]
+
+def init_db():
+    conn = _connect()
+    cur = conn.cursor()
+    current = cur.execute("PRAGMA user_version").fetchone()[0]
+    for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+        cur.execute("BEGIN IMMEDIATE")
+        # Another process may have migrated while we waited for the lock.
+        if cur.execute("PRAGMA user_version").fetchone()[0] >= version:
+            conn.rollback()
+            continue
+        migration(cur)
+        cur.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+    sqlite3.Connection.close(conn)
+
+RESUME_FIELDS = (
+    "student_name", "file_path", "jd_file", "relevance_score", "verdict",
+    "original_filename", "content_hash", "jd_content_hash", "scoring_version", "missing",
+    "keyword_overlap", "similarity", "content_coverage",
+)
+
+def insert_resumes(conn, rows):
+    """Insert resume result dicts in one transaction.
+
+    Returns each row's id, or None where an identical submission (same
+    student, content hash, JD hash and scoring version) was already stored. A row's
+    optional "text" (the extracted resume text) is stored for full-text
+    search, once per content hash.
+    """
+    sql = f"INSERT OR IGNORE INTO resumes({','.join(RESUME_FIELDS)}) VALUES({','.join('?' * len(RESUME_FIELDS))})"
+    ids = []
+    with transaction(conn):
+        for row in rows:
+            values = [row.get(field) for field in RESUME_FIELDS]
+            values[RESUME_FIELDS.index("missing")] = json.dumps(row.get("missing"))
+            cur = conn.execute(sql, values)
+            ids.append(cur.lastrowid if cur.rowcount else None)
+            if row.get("text") and row.get("content_hash"):
+                conn.execute("INSERT OR IGNORE INTO resume_texts(content_hash, text) VALUES(?, ?)", (row["content_hash"], row["text"]))
+    return ids
+
+def record_application(conn, scored_id, student_name, file_path, jd_file, original_filename=None):
+    """Store an application whose result is copied from the already-scored row `scored_id` (same bytes, JD and version).
+
+    Returns the new row's id, or None if this student already has that result stored.
+    """
+    with transaction(conn):
+        cur = conn.execute(
+            """
+            INSERT OR IGNORE INTO resumes(student_name, file_path, jd_file, original_filename, content_hash, jd_content_hash,
+                                          scoring_version, relevance_score, verdict, missing, keyword_overlap, similarity,
+                                          content_coverage)
+            SELECT ?, ?, ?, ?, content_hash, jd_content_hash, scoring_version, relevance_score, verdict, missing,
+                   keyword_overlap, similarity, content_coverage
+            FROM resumes WHERE id = ?
+            """,
+            (student_name, file_path, jd_file, original_filename, scored_id),
+        )
+    return cur.lastrowid if cur.rowcount else None
+
+def find_scored_resume(conn, content_hash, jd_content_hash, scoring_version):
+    row = conn.execute(
+        "SELECT id, relevance_score, verdict, missing FROM resumes WHERE content_hash=? AND jd_content_hash=? AND scoring_version=?",
+        (content_hash, jd_content_hash, scoring_version),
+    ).fetchone()
+    if row is None:
+        return None
+    return {"id": row[0], "score": row[1], "verdict": row[2], "missing": json.loads(row[3]) if row[3] else None}
+
+def daily_summary(conn, day):
+    """Counts and average scores for `day` (YYYY-MM-DD, UTC) and for all time, from daily_stats."""
+    today = conn.execute(
+        "SELECT resumes, scored, score_sum, jds FROM daily_stats WHERE day = ?", (day,)
+    ).fetchone() or (0, 0, 0.0, 0)
+    total = conn.execute(
+        "SELECT COALESCE(SUM(resumes), 0), COALESCE(SUM(scored), 0), COALESCE(SUM(score_sum), 0), COALESCE(SUM(jds), 0) FROM daily_stats"
+    ).fetchone()
+    return {
+        "day": day,
+        "resumes_today": today[0],
+        "resumes_total": total[0],
+        "avg_score_today": today[2] / today[1] if today[1] else 0.0,
+        "avg_score_total": total[2] / total[1] if total[1] else 0.0,
+        "jds_today": today[3],
+        "jds_total": total[3],
+    }
+
+def top_resumes(conn, k):
+    rows = conn.execute(
+        "SELECT id, student_name, COALESCE(original_filename, file_path), relevance_score, verdict FROM resumes "
+        "WHERE relevance_score IS NOT NULL ORDER BY relevance_score DESC, id DESC LIMIT ?",
+        (k,),
+    ).fetchall()
+    return [
+        {"id": row[0], "student_name": row[1], "file_path": row[2], "relevance_score": row[3], "verdict": row[4]}
+        for row in rows
+    ]
+
+def list_applications(conn, before_id=None, limit=20):
+    """Newest-first page of applications. Pass the returned next_before_id to get the following page.
+
+    Keyset pagination on the primary key: every page costs the same, however
+    deep into the table it is.
+    """
+    where, params = ("WHERE id < ?", [before_id]) if before_id is not None else ("", [])
+    rows = conn.execute(
+        "SELECT id, student_name, COALESCE(original_filename, file_path), jd_file, relevance_score, verdict, created_at "
+        f"FROM resumes {where} ORDER BY id DESC LIMIT ?",
+        (*params, limit + 1),
+    ).fetchall()
+    items = [
+        {"id": row[0], "student_name": row[1], "file_path": row[2], "jd_file": row[3],
+         "relevance_score": row[4], "verdict": row[5], "created_at": row[6]}
+        for row in rows[:limit]
+    ]
+    return {"items": items, "next_before_id": items[-1]["id"] if len(rows) > limit else None}
 
 def create_user(username, email, password):
     conn = get_conn()
@@ -0,0 +1,143 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+# Append-only index of normalized resume embeddings. Vectors live in a raw
+# float32 file that is memory-mapped for queries; a parallel int64 file maps
+# each row back to its resumes.id. Raw files (rather than .npy) let new rows be
+# appended without rewriting a header. A resume whose embedding changes is
+# appended again; the last row for an id is the live one. Appends hold an
+# exclusive flock on LOCK_PATH so several server or batch processes can share
+# the index.
+INDEX_DIR = Path("outputs")
+VECTORS_PATH = INDEX_DIR / "resume_index.f32"
+IDS_PATH = INDEX_DIR / "resume_index.ids"
+DIM_PATH = INDEX_DIR / "resume_index.dim"
+LOCK_PATH = INDEX_DIR / "resume_index.lock"
+INDEX_DIR.mkdir(exist_ok=True)
+
+_lock = threading.Lock()
+_cache = {"rows": -1, "ids": None, "vectors": None, "order": None, "stale": None}
+
+
+@contextmanager
+def _append_lock():
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(LOCK_PATH, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def append(resume_ids, vectors):
+    """Append embeddings for the given resume ids to the on-disk index."""
+    ids = np.asarray(resume_ids, dtype=np.int64)
+    if not len(ids) and not len(vectors):
+        return
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    if len(ids) != len(vectors):
+        raise ValueError("resume_ids and vectors must have the same length")
+    with _append_lock():
+        dim = vectors.shape[1]
+        if not DIM_PATH.exists():
+            DIM_PATH.write_text(str(dim))
+        elif int(DIM_PATH.read_text()) != dim:
+            raise ValueError(f"index holds {DIM_PATH.read_text()}-d vectors, got {dim}-d")
+        rows = os.path.getsize(IDS_PATH) // 8 if IDS_PATH.exists() else 0
+        # Vectors first: readers size the index from the ids file, so a crash
+        # between the two writes never exposes a row without its vector. Any
+        # tail left by such a crash is trimmed before the next append.
+        with open(VECTORS_PATH, "ab") as f:
+            f.truncate(rows * dim * 4)
+            f.write(vectors.tobytes())
+        with open(IDS_PATH, "ab") as f:
+            f.write(ids.tobytes())
+
+
+def _load():
+    rows = os.path.getsize(IDS_PATH) // 8 if IDS_PATH.exists() else 0
+    with _lock:
+        if rows == _cache["rows"]:
+            return _cache["ids"], _cache["vectors"]
+        if rows == 0:
+            ids = np.empty(0, dtype=np.int64)
+            vectors = np.empty((0, 0), dtype=np.float32)
+        else:
+            dim = int(DIM_PATH.read_text())
+            ids = np.memmap(IDS_PATH, dtype=np.int64, mode="r", shape=(rows,))
+            vectors = np.memmap(VECTORS_PATH, dtype=np.float32, mode="r", shape=(rows, dim))
+        _cache.update(rows=rows, ids=ids, vectors=vectors, order=None, stale=None)
+        return ids, vectors
+
+
+def size():
+    return len(_load()[0])
+
+
+def _order(ids):
+    """Stable sort order of `ids` and a mask of rows superseded by a later row for the same id (None if there are none)."""
+    with _lock:
+        if _cache["ids"] is ids and _cache["order"] is not None:
+            return _cache["order"], _cache["stale"]
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    repeated = sorted_ids[:-1] == sorted_ids[1:]
+    stale = None
+    if repeated.any():
+        stale = np.zeros(len(ids), dtype=bool)
+        stale[order[:-1][repeated]] = True
+    with _lock:
+        if _cache["ids"] is ids:
+            _cache.update(order=order, stale=stale)
+    return order, stale
+
+
+def top_k(query, k=20):
+    """Return [(resume_id, similarity), ...] for the k stored resumes closest to `query`."""
+    ids, vectors = _load()
+    if not len(ids) or k <= 0:
+        return []
+    query = np.asarray(query, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    scores = vectors @ query
+    _, stale = _order(ids)
+    if stale is not None:
+        scores[stale] = -np.inf
+        k = min(k, len(scores) - int(stale.sum()))
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best])]
+    return [(int(ids[i]), float(scores[i])) for i in best]
+
+
+def vectors_for(resume_ids):
+    """Return {resume_id: vector} for those of `resume_ids` that are in the index, using the latest row for each."""
+    ids, vectors = _load()
+    if not len(ids) or not len(resume_ids):
+        return {}
+    order, _ = _order(ids)
+    wanted = np.asarray(resume_ids, dtype=np.int64)
+    positions = np.searchsorted(ids, wanted, side="right", sorter=order) - 1
+    found = {}
+    for resume_id, position in zip(wanted, positions):
+        if position >= 0 and ids[order[position]] == resume_id:
+            found[int(resume_id)] = np.asarray(vectors[order[position]])
+    return found
@@ -0,0 +1,96 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+import models
+import scoring
+from extraction import extract_text
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def _measure(backend, texts, batch_size):
+    rss_before = models._rss_bytes()
+    started = time.perf_counter()
+    model = models.load_embed_backend(backend)
+    load_seconds = time.perf_counter() - started
+    rss_delta = models._rss_bytes() - rss_before
+
+    model.encode(texts[:1], convert_to_numpy=True)  # first call pays one-off graph/kernel setup
+    started = time.perf_counter()
+    for text in texts:
+        model.encode(text, convert_to_numpy=True)
+    single_ms = (time.perf_counter() - started) / len(texts) * 1000
+    started = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    batch_ms = (time.perf_counter() - started) / len(texts) * 1000
+    del model
+    return embeddings.astype(np.float32), {
+        "load_seconds": round(load_seconds, 3),
+        "rss_delta_bytes": rss_delta,
+        "ms_per_text_single": round(single_ms, 2),
+        "ms_per_text_batched": round(batch_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends against fp32 PyTorch on sample resumes.")
+    parser.add_argument("resume_dir", nargs="?", default="data/resumes")
+    parser.add_argument("--jd", default="data/jds/sample_jd.pdf", help="JD used to check that verdicts don't change")
+    parser.add_argument("--backends", nargs="+", default=["int8", "onnx"], choices=models.EMBED_BACKENDS)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    paths = sorted(
+        path for path in Path(args.resume_dir).iterdir()
+        if path.is_file() and path.name.lower().endswith(RESUME_EXTENSIONS)
+    )
+    if not paths:
+        parser.error(f"No resumes found in {args.resume_dir}")
+    texts = [extract_text(str(path)) for path in paths]
+    jd_text = extract_text(args.jd)
+    jd = dict(zip(("tokens", "matches"), scoring.lexical_analysis(jd_text)))
+    lexical = [scoring.lexical_analysis(text) for text in texts]
+
+    def verdicts(resume_embs, jd_emb):
+        results = scoring.score_analyzed({**jd, "embedding": jd_emb}, lexical, resume_embs)
+        return [(result["score"], result["verdict"]) for result in results]
+
+    # Each backend is loaded, timed and released in turn so RSS deltas don't overlap.
+    results = {}
+    for backend in ["torch", *[b for b in args.backends if b != "torch"]]:
+        embeddings, timing = _measure(backend, [jd_text, *texts], args.batch_size)
+        results[backend] = {"jd": embeddings[0], "resumes": embeddings[1:], "timing": timing}
+
+    reference = results["torch"]
+    reference_verdicts = verdicts(reference["resumes"], reference["jd"])
+    report = {"resumes": len(paths), "jd": args.jd, "backends": {"torch": reference["timing"]}}
+    for backend in args.backends:
+        if backend == "torch":
+            continue
+        candidate = results[backend]
+        cosine = np.sum(reference["resumes"] * candidate["resumes"], axis=1)
+        candidate_verdicts = verdicts(candidate["resumes"], candidate["jd"])
+        changed = [
+            {"file": path.name, "fp32": ref_verdict, backend: verdict, "score_delta": round(score - ref_score, 3)}
+            for path, (ref_score, ref_verdict), (score, verdict) in zip(paths, reference_verdicts, candidate_verdicts)
+            if verdict != ref_verdict
+        ]
+        report["backends"][backend] = {
+            **candidate["timing"],
+            "cosine_to_fp32_min": round(float(cosine.min()), 5),
+            "cosine_to_fp32_mean": round(float(cosine.mean()), 5),
+            "max_score_delta": round(max(
+                abs(score - ref_score) for (ref_score, _), (score, _) in zip(reference_verdicts, candidate_verdicts)
+            ), 3),
+            "verdicts_changed": changed,
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from models import get_embed_model
+
+# In-process micro-batching for single-text embeddings. Request threads submit
+# a text and wait on a future; one dispatcher thread gathers whatever arrives
+# within EMBED_BATCH_MAX_WAIT_MS (up to EMBED_BATCH_MAX_SIZE texts) and runs a
+# single batched encode. On CPU a batch of 16 costs far less than 16 separate
+# calls, so concurrent uploads share the model instead of queueing behind it.
+# When EMBED_QUEUE_MAX_DEPTH texts are already waiting, submit() raises
+# queue.Full and the API answers 503 rather than letting latency grow unbounded;
+# queued jobs go back to pending and are retried (see job_queue.py). A caller
+# whose embedding isn't ready within EMBED_RESULT_TIMEOUT_SECONDS gets
+# TimeoutError, handled the same way.
+ENABLED = os.environ.get("EMBED_MICROBATCH", "1") == "1"
+MAX_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_MAX_SIZE", "32"))
+MAX_WAIT_SECONDS = float(os.environ.get("EMBED_BATCH_MAX_WAIT_MS", "5")) / 1000
+MAX_QUEUE_DEPTH = int(os.environ.get("EMBED_QUEUE_MAX_DEPTH", "256"))
+SUBMIT_TIMEOUT_SECONDS = float(os.environ.get("EMBED_SUBMIT_TIMEOUT_MS", "100")) / 1000
+RESULT_TIMEOUT_SECONDS = float(os.environ.get("EMBED_RESULT_TIMEOUT_SECONDS", "30"))
+
+_queue = queue.Queue(maxsize=MAX_QUEUE_DEPTH)
+_lock = threading.Lock()
+_dispatcher = None
+_inflight = 0
+_stats = {"submitted": 0, "rejected": 0, "timed_out": 0, "batches": 0, "items": 0, "max_batch": 0, "encode_seconds": 0.0}
+
+
+def _encode(texts):
+    embeddings = get_embed_model().encode(texts, batch_size=len(texts), convert_to_numpy=True, normalize_embeddings=True)
+    return embeddings.astype(np.float32)
+
+
+def _next_batch():
+    batch = [_queue.get()]
+    # A lone caller is encoded immediately; the wait only pays off when other
+    # requests are already in flight and about to enqueue.
+    if _inflight <= 1:
+        return batch
+    deadline = time.monotonic() + MAX_WAIT_SECONDS
+    while len(batch) < MAX_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        try:
+            batch.append(_queue.get(timeout=remaining) if remaining > 0 else _queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _dispatch():
+    global _inflight
+    while True:
+        taken = _next_batch()
+        batch = [(text, future) for text, future in taken if future.set_running_or_notify_cancel()]
+        started = time.perf_counter()
+        try:
+            embeddings = _encode([text for text, _ in batch]) if batch else []
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            continue
+        finally:
+            with _lock:
+                _inflight -= len(taken)
+        if not batch:
+            continue
+        with _lock:
+            _stats["batches"] += 1
+            _stats["items"] += len(batch)
+            _stats["max_batch"] = max(_stats["max_batch"], len(batch))
+            _stats["encode_seconds"] += time.perf_counter() - started
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
+
+
+def _ensure_dispatcher():
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = threading.Thread(target=_dispatch, name="embedding-dispatcher", daemon=True)
+            _dispatcher.start()
+
+
+def _reset():
+    global _queue, _lock, _dispatcher, _inflight
+    _queue = queue.Queue(maxsize=MAX_QUEUE_DEPTH)
+    _lock = threading.Lock()
+    _dispatcher = None
+    _inflight = 0
+
+# The dispatcher thread does not survive fork; each worker starts its own.
+os.register_at_fork(after_in_child=_reset)
+
+
+def submit(text, timeout=SUBMIT_TIMEOUT_SECONDS):
+    """Queue `text` for the next batch and return a Future of its normalized float32 embedding.
+
+    Raises queue.Full if the queue stays full for `timeout` seconds.
+    """
+    global _inflight
+    if _dispatcher is None:
+        _ensure_dispatcher()
+    future = Future()
+    with _lock:
+        _inflight += 1
+    try:
+        _queue.put((text, future), timeout=timeout)
+    except queue.Full:
+        with _lock:
+            _inflight -= 1
+            _stats["rejected"] += 1
+        raise
+    with _lock:
+        _stats["submitted"] += 1
+    return future
+
+
+def _result(future, deadline):
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeout:
+        # Still queued: cancelling keeps the dispatcher from encoding it.
+        future.cancel()
+        with _lock:
+            _stats["timed_out"] += 1
+        raise TimeoutError(f"Embedding not ready within {RESULT_TIMEOUT_SECONDS:g}s") from None
+
+
+def embed(text, timeout=RESULT_TIMEOUT_SECONDS):
+    """Normalized float32 embedding of one text, batched with concurrent callers when enabled.
+
+    Raises TimeoutError if the embedding isn't ready within `timeout` seconds.
+    """
+    if not ENABLED:
+        return _encode([text])[0]
+    return _result(submit(text), time.monotonic() + timeout)
+
+
+def embed_many(texts, timeout=RESULT_TIMEOUT_SECONDS):
+    """Normalized float32 embeddings of several texts; with micro-batching they share batches with other callers.
+
+    Raises TimeoutError if they aren't all ready within `timeout` seconds.
+    """
+    if not ENABLED:
+        return _encode(texts)
+    futures = [submit(text) for text in texts]
+    deadline = time.monotonic() + timeout
+    try:
+        return np.stack([_result(future, deadline) for future in futures])
+    except TimeoutError:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def stats():
+    with _lock:
+        batches = _stats["batches"]
+        return {
+            "enabled": ENABLED,
+            "max_batch_size": MAX_BATCH_SIZE,
+            "max_wait_ms": MAX_WAIT_SECONDS * 1000,
+            "max_queue_depth": MAX_QUEUE_DEPTH,
+            "queue_depth": _queue.qsize(),
+            **_stats,
+            "mean_batch": _stats["items"] / batches if batches else 0.0,
+        }
@@ -0,0 +1,197 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import date
+
+from database import init_db, get_conn
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Bulk export of application results for reporting. Rows are read in
+# CHUNK_SIZE keyset pages on the primary key and encoded one chunk at a time,
+# so memory stays flat however large the table is, and no read transaction is
+# held open while a slow client downloads. Each row carries the role of the
+# latest posting for its JD. Parquet needs pyarrow; every chunk becomes one
+# row group.
+CHUNK_SIZE = 10000
+FORMATS = ("csv", "ndjson", "parquet")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+COLUMNS = (
+    "id", "created_at", "student_name", "original_filename", "jd_file", "role", "relevance_score", "verdict",
+    "keyword_overlap", "similarity", "content_coverage", "missing",
+)
+_SELECT = """
+    SELECT r.id, r.created_at, r.student_name, COALESCE(r.original_filename, r.file_path), r.jd_file,
+           (SELECT j.role FROM jobs j WHERE j.jd_file = r.jd_file ORDER BY j.id DESC LIMIT 1),
+           r.relevance_score, r.verdict, r.keyword_overlap, r.similarity, r.content_coverage, r.missing
+    FROM resumes r
+"""
+
+
+def _where(pairs):
+    pairs = [(clause, value) for clause, value in pairs if value is not None]
+    return [clause for clause, _ in pairs], [value for _, value in pairs]
+
+
+def chunks(start=None, end=None, jd_file=None, verdict=None, chunk_size=CHUNK_SIZE):
+    """Lists of row tuples (in COLUMNS order) matching the filters, oldest first.
+
+    start and end are inclusive UTC days (YYYY-MM-DD); a malformed one raises
+    ValueError here rather than once the export is under way.
+    """
+    date_clauses, date_params = _where([
+        ("r.created_at >= ?", start and date.fromisoformat(start).isoformat()),
+        ("r.created_at < date(?, '+1 day')", end and date.fromisoformat(end).isoformat()),
+    ])
+    clauses, params = _where([("r.jd_file = ?", jd_file), ("r.verdict = ?", verdict)])
+    return _pages(date_clauses, date_params, date_clauses + clauses, date_params + params, chunk_size)
+
+
+def _pages(date_clauses, date_params, clauses, params, chunk_size):
+    conn = get_conn()
+    # Ids grow with created_at, so the date range maps to an id range found
+    # through the created_at index; each page is then a primary-key range scan.
+    low, high = conn.execute(
+        f"SELECT MIN(id) - 1, MAX(id) FROM resumes r {'WHERE ' + ' AND '.join(date_clauses) if date_clauses else ''}",
+        date_params,
+    ).fetchone()
+    conn.close()
+    if high is None:
+        return
+
+    sql = f"{_SELECT} WHERE {' AND '.join(['r.id > ?', 'r.id <= ?', *clauses])} ORDER BY r.id LIMIT ?"
+    last_id = low
+    while True:
+        conn = get_conn()
+        rows = conn.execute(sql, (last_id, high, *params, chunk_size)).fetchall()
+        conn.close()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def _csv(row_chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for rows in row_chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson(row_chunks):
+    # "missing" is stored as JSON text and spliced in as-is rather than
+    # round-tripped through json.loads for every row.
+    names = COLUMNS[:-1]
+    for rows in row_chunks:
+        lines = []
+        for row in rows:
+            head = json.dumps(dict(zip(names, row)), ensure_ascii=False)
+            lines.append(f'{head[:-1]}, "missing": {row[-1] or "null"}}}')
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _Drain:
+    """Write-only file object that hands out what was written since the last drain."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet(row_chunks):
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    schema = pa.schema([
+        ("id", pa.int64()), ("created_at", pa.string()), ("student_name", pa.string()),
+        ("original_filename", pa.string()), ("jd_file", pa.string()), ("role", pa.string()),
+        ("relevance_score", pa.float64()), ("verdict", pa.string()), ("keyword_overlap", pa.float64()),
+        ("similarity", pa.float64()), ("content_coverage", pa.float64()), ("missing", pa.string()),
+    ])
+    sink = _Drain()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in row_chunks:
+            arrays = [pa.array(column, type=field.type) for column, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def encode(fmt, row_chunks):
+    """Encode row chunks as `fmt`, yielding bytes as each chunk is done."""
+    if fmt == "csv":
+        return _csv(row_chunks)
+    if fmt == "ndjson":
+        return _ndjson(row_chunks)
+    if fmt == "parquet":
+        return _parquet(row_chunks)
+    raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != "parquet" or pa is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export application results joined with their roles.")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--start", help="First day to include, YYYY-MM-DD (UTC)")
+    parser.add_argument("--end", help="Last day to include, YYYY-MM-DD (UTC)")
+    parser.add_argument("--jd-file")
+    parser.add_argument("--verdict")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    if args.format == "parquet" and pa is None:
+        parser.error("Parquet export requires pyarrow (pip install pyarrow)")
+
+    init_db()
+    try:
+        data = encode(args.format, chunks(args.start, args.end, args.jd_file, args.verdict, args.chunk_size))
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for part in data:
+                out.write(part)
+        finally:
+            if args.output:
+                out.close()
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
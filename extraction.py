@@ -0,0 +1,200 @@
+import hashlib
+import os
+import threading
+import unicodedata
+import uuid
+from pathlib import Path
+
+import docx2txt
+import fitz
+
+import metrics
+
+# Text extraction with a content-addressed cache. Extracted text is stored
+# under the SHA-256 of the source file's bytes, so a resume submitted to
+# several openings (or a JD read for every applicant) is parsed only once.
+# The cache directory is bounded by TEXT_CACHE_MAX_BYTES and evicts the least
+# recently used entries first; TEXT_CACHE_MAX_BYTES=0 turns the cache off.
+TEXT_CACHE_DIR = Path(os.environ.get("TEXT_CACHE_DIR", "outputs/text_cache"))
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("TEXT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.environ.get("EXTRACT_MAX_PDF_PAGES", "50"))
+MAX_FILE_BYTES = int(os.environ.get("EXTRACT_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+MAX_TEXT_CHARS = int(os.environ.get("EXTRACT_MAX_TEXT_CHARS", "200000"))
+if TEXT_CACHE_MAX_BYTES > 0:
+    TEXT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+CHUNK_SIZE = 1 << 20
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_cache_bytes = None
+
+
+def file_sha256(file_path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(src, dest_path, chunk_size=CHUNK_SIZE):
+    """Copy a file object to disk in chunks, hashing as it goes. Returns (sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as f:
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            digest.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+    return digest.hexdigest(), size
+
+
+def store_upload(src, directory, filename):
+    """Save an upload as <directory>/<sha256><ext>. Returns (path, sha256).
+
+    Content-addressed names mean two candidates uploading "resume.pdf" can
+    never overwrite each other, and identical bytes are stored once.
+    """
+    tmp_path = upload_tmp_path(directory)
+    content_hash, _ = save_upload(src, tmp_path)
+    return place_upload(tmp_path, directory, filename, content_hash), content_hash
+
+
+def upload_tmp_path(directory):
+    return os.path.join(directory, f".upload-{uuid.uuid4().hex}")
+
+
+def place_upload(tmp_path, directory, filename, content_hash):
+    """Move a fully written upload to its content-addressed name; returns the final path."""
+    ext = os.path.splitext(filename)[1].lower()
+    save_path = os.path.join(directory, f"{content_hash}{ext}")
+    if os.path.exists(save_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, save_path)
+    return save_path
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFC", text)
+    return text.replace("\r\n", "\n").replace("\x00", "")[:MAX_TEXT_CHARS]
+
+
+def _extract_uncached(file_path):
+    ext = file_path.lower()
+    try:
+        if os.path.getsize(file_path) > MAX_FILE_BYTES:
+            return f"[ERROR] Could not extract text from {file_path}: file exceeds {MAX_FILE_BYTES} bytes"
+        if ext.endswith(".pdf"):
+            pages = []
+            chars = 0
+            with fitz.open(file_path) as doc:
+                for page in doc.pages(0, min(doc.page_count, MAX_PDF_PAGES)):
+                    pages.append(page.get_text())
+                    chars += len(pages[-1])
+                    if chars >= MAX_TEXT_CHARS:
+                        break
+            return normalize_text("\n".join(pages))
+        elif ext.endswith(".docx"):
+            return normalize_text(docx2txt.process(file_path))
+        else:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return normalize_text(f.read(MAX_TEXT_CHARS))
+    except Exception as e:
+        return f"[ERROR] Could not extract text from {file_path}: {e}"
+
+
+def _cache_path(content_hash):
+    # The limits are part of the key: raising a cap must not serve text that
+    # was truncated under the old one.
+    return TEXT_CACHE_DIR / content_hash[:2] / f"{content_hash}.p{MAX_PDF_PAGES}.c{MAX_TEXT_CHARS}.txt"
+
+
+def _current_cache_bytes():
+    global _cache_bytes
+    if _cache_bytes is None:
+        _cache_bytes = sum(size for _, size, _ in _cache_entries())
+    return _cache_bytes
+
+
+def _cache_entries():
+    # Other processes evict and replace entries too; one that vanished after
+    # the glob is simply skipped.
+    for path in TEXT_CACHE_DIR.glob("*/*.txt"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        yield stat.st_mtime, stat.st_size, path
+
+
+def _evict():
+    global _cache_bytes
+    entries = sorted(_cache_entries())
+    target = TEXT_CACHE_MAX_BYTES * 0.9
+    for _, size, path in entries:
+        if _cache_bytes <= target:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        _cache_bytes -= size
+        _stats["evictions"] += 1
+
+
+def _store(content_hash, text):
+    global _cache_bytes
+    path = _cache_path(content_hash)
+    path.parent.mkdir(exist_ok=True)
+    data = text.encode("utf-8")
+    with _lock:
+        _current_cache_bytes()
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    with _lock:
+        _cache_bytes += len(data)
+        if _cache_bytes > TEXT_CACHE_MAX_BYTES:
+            _evict()
+
+
+def extract_text(file_path, content_hash=None):
+    if TEXT_CACHE_MAX_BYTES <= 0:
+        text = _extract_uncached(file_path)
+        if not text.startswith("[ERROR]"):
+            metrics.inc("extracted_bytes_total", len(text.encode("utf-8")))
+        return text
+    if content_hash is None:
+        try:
+            content_hash = file_sha256(file_path)
+        except OSError:
+            return _extract_uncached(file_path)
+    path = _cache_path(content_hash)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        os.utime(path)  # mtime doubles as the LRU timestamp
+    except FileNotFoundError:
+        pass
+    else:
+        with _lock:
+            _stats["hits"] += 1
+        metrics.inc("text_cache_requests_total", result="hit")
+        return text
+
+    with _lock:
+        _stats["misses"] += 1
+    metrics.inc("text_cache_requests_total", result="miss")
+    text = _extract_uncached(file_path)
+    if not text.startswith("[ERROR]"):
+        metrics.inc("extracted_bytes_total", len(text.encode("utf-8")))
+        _store(content_hash, text)
+    return text
+
+
+def cache_stats():
+    with _lock:
+        return {**_stats, "bytes": _current_cache_bytes(), "max_bytes": TEXT_CACHE_MAX_BYTES}
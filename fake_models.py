@@ -0,0 +1,48 @@
+import hashlib
+import os
+import time
+
+import numpy as np
+
+# Offline stand-ins for the scoring models, enabled with FAKE_MODELS=1 (see
+# models.py). Everything around inference stays real: extraction, the spaCy
+# tokenizer (a blank English pipeline tokenizes exactly like en_core_web_sm,
+# and scoring only uses the tokenizer), taxonomy matching, the micro-batcher,
+# SQLite and the queues. Only the sentence-transformer is replaced, by a
+# deterministic hashed bag-of-words embedder that sleeps for a configurable
+# time per encode call and per text, so load tests can set inference cost
+# explicitly and measure everything else. Use a scratch data directory: the
+# vectors mean nothing next to real ones.
+LATENCY_PER_CALL_SECONDS = float(os.environ.get("FAKE_EMBED_LATENCY_MS", "0")) / 1000
+LATENCY_PER_TEXT_SECONDS = float(os.environ.get("FAKE_EMBED_LATENCY_PER_TEXT_MS", "0")) / 1000
+DIMENSION = int(os.environ.get("FAKE_EMBED_DIM", "384"))
+
+
+class FakeEmbedder:
+    """Deterministic replacement for SentenceTransformer.encode: same text, same vector."""
+
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+    def _embed(self, text):
+        vector = np.zeros(DIMENSION, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            vector[int.from_bytes(digest, "little") % DIMENSION] += 1.0
+        return vector
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        delay = LATENCY_PER_CALL_SECONDS + LATENCY_PER_TEXT_SECONDS * len(texts)
+        if delay:
+            time.sleep(delay)
+        vectors = np.stack([self._embed(text) for text in texts]) if texts else np.zeros((0, DIMENSION), dtype=np.float32)
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+def load_nlp():
+    import spacy
+    return spacy.blank("en")
@@ -0,0 +1,15 @@
+import multiprocessing
+import os
+
+# Preload-then-fork deployment: the master imports app.py once with
+# MODEL_WARMUP=preload so spaCy and the sentence-transformer are loaded before
+# the uvicorn workers are forked and shared between them copy-on-write.
+#
+#   gunicorn app:app -c gunicorn.conf.py
+os.environ.setdefault("MODEL_WARMUP", "preload")
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 180
@@ -0,0 +1,253 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import embedding_index
+import scoring
+from database import init_db, get_conn, insert_resumes, WRITE_BATCH_SIZE
+from extraction import extract_text, file_sha256, store_upload
+from jd_artifacts import get_jd_artifact
+
+# Streaming bulk ingest for large backfills:
+#
+#   files/zip -> process pool (hash, extract, tokenize, taxonomy match)
+#             -> embedding thread (one batched encode per --batch-size docs)
+#             -> writer thread (insert_resumes + resume index, per write batch)
+#
+# Extraction and tokenization hold the GIL, so they run in worker processes;
+# the model stays in this process. Every hop is bounded (in-flight futures,
+# then two queues), so the documents held in memory stay flat however large
+# the corpus is. Files whose content hash is already scored against this JD
+# with the current scoring version are skipped, which makes an interrupted run
+# resumable, and a file repeated within the run is only analyzed once. Those
+# checks keep a set of content hashes (already stored, plus new this run) that
+# does grow with the corpus, at roughly 100-150 bytes per file; each worker
+# process holds a copy of the already-stored part.
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+_DONE = object()
+
+_skip_hashes = frozenset()
+
+
+def _init_worker(skip_hashes):
+    global _skip_hashes
+    _skip_hashes = skip_hashes
+    scoring.lexical_analysis("warm up")  # load the tokenizer and compile the taxonomy once per worker
+
+
+def _analyze(path):
+    content_hash = file_sha256(path)
+    if content_hash in _skip_hashes:
+        return path, content_hash, None
+    text = extract_text(path, content_hash)
+    if text.startswith("[ERROR]"):
+        return path, content_hash, text
+    tokens, matches = scoring.lexical_analysis(text)
+    return path, content_hash, (text, tokens, matches)
+
+
+def _sources(source):
+    """Yield (original filename, path on disk) for every resume in a directory tree or zip archive."""
+    if zipfile.is_zipfile(source):
+        Path("data/resumes").mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not name.lower().endswith(RESUME_EXTENSIONS):
+                    continue
+                with archive.open(member) as src:
+                    path, _ = store_upload(src, "data/resumes", name)
+                yield name, path
+    else:
+        for path in sorted(Path(source).rglob("*")):
+            if path.is_file() and path.name.lower().endswith(RESUME_EXTENSIONS):
+                yield path.name, str(path)
+
+
+def _ingested_hashes(jd_hash, version):
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT content_hash FROM resumes WHERE jd_content_hash = ? AND scoring_version = ? AND content_hash IS NOT NULL",
+        (jd_hash, version),
+    ).fetchall()
+    conn.close()
+    return frozenset(row[0] for row in rows)
+
+
+class Progress:
+    def __init__(self, every):
+        self.every = every
+        self.started = time.perf_counter()
+        self.counts = {"analyzed": 0, "skipped": 0, "failed": 0, "written": 0, "duplicates": 0}
+        self._lock = threading.Lock()
+
+    def add(self, key, n=1):
+        with self._lock:
+            self.counts[key] += n
+            done = self.counts["analyzed"] + self.counts["skipped"] + self.counts["failed"]
+            if key in ("analyzed", "skipped", "failed") and done % self.every == 0:
+                self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.counts["analyzed"] / elapsed if elapsed else 0.0
+        print(" ".join(f"{k}={v}" for k, v in self.counts.items()) + f" rate={rate:.1f}/s", file=sys.stderr, flush=True)
+
+
+def _guarded(fn, errors):
+    if errors:
+        return
+    try:
+        fn()
+    except Exception as e:
+        errors.append(e)
+
+
+def _embed_stage(jd_artifact, batch_size, analyzed, to_write, errors):
+    batch = []
+
+    def flush():
+        texts = [text for _, _, _, (text, _, _) in batch]
+        results = scoring.score_analyzed(jd_artifact, [(tokens, matches) for _, _, _, (_, tokens, matches) in batch], scoring.embed_batch(texts, batch_size))
+        for text, result in zip(texts, results):
+            result["text"] = text
+        to_write.put([(name, path, content_hash, result) for (name, path, content_hash, _), result in zip(batch, results)])
+
+    # On failure the stage keeps draining its input so upstream puts never
+    # block; ingest() raises once everything has shut down.
+    while True:
+        item = analyzed.get()
+        if item is _DONE:
+            break
+        batch.append(item)
+        if len(batch) >= batch_size or errors:
+            _guarded(flush, errors)
+            batch.clear()
+    if batch:
+        _guarded(flush, errors)
+    to_write.put(_DONE)
+
+
+def _write_stage(jd_file, jd_artifact, version, write_batch_size, to_write, progress, errors):
+    conn = get_conn()
+    pending = []
+
+    def flush():
+        rows = [
+            {
+                "student_name": Path(name).stem, "file_path": path, "jd_file": jd_file,
+                "relevance_score": result["score"], "verdict": result["verdict"], "original_filename": name,
+                "content_hash": content_hash, "jd_content_hash": jd_artifact["hash"],
+                "scoring_version": version, "missing": result["missing"], "text": result["text"], **result["components"],
+            }
+            for name, path, content_hash, result in pending
+        ]
+        resume_ids = insert_resumes(conn, rows)
+        new = [(resume_id, result["embedding"]) for resume_id, (_, _, _, result) in zip(resume_ids, pending) if resume_id is not None]
+        embedding_index.append([resume_id for resume_id, _ in new], [emb for _, emb in new])
+        progress.add("written", len(new))
+        progress.add("duplicates", len(pending) - len(new))
+
+    while True:
+        items = to_write.get()
+        if items is _DONE:
+            break
+        pending.extend(items)
+        if len(pending) >= write_batch_size or errors:
+            _guarded(flush, errors)
+            pending.clear()
+    if pending:
+        _guarded(flush, errors)
+    conn.close()
+
+
+def ingest(source, jd_path, workers=None, batch_size=64, queue_size=256, write_batch_size=WRITE_BATCH_SIZE, progress_every=500):
+    """Score every resume under `source` (directory or zip) against `jd_path` and store the results; returns the counts."""
+    init_db()
+    jd_artifact = get_jd_artifact(jd_path)
+    version = scoring.scoring_version()
+    skip = _ingested_hashes(jd_artifact["hash"], version)
+    workers = workers or os.cpu_count() or 1
+    progress = Progress(progress_every)
+
+    errors = []
+    analyzed = queue.Queue(maxsize=queue_size)
+    to_write = queue.Queue(maxsize=max(queue_size // batch_size, 2))
+    embedder = threading.Thread(target=_embed_stage, args=(jd_artifact, batch_size, analyzed, to_write, errors), daemon=True)
+    writer = threading.Thread(
+        target=_write_stage, args=(os.path.basename(jd_path), jd_artifact, version, write_batch_size, to_write, progress, errors), daemon=True
+    )
+    embedder.start()
+    writer.start()
+
+    # spawn, not fork: this process already holds the embedding model and its
+    # thread pools, which must not be inherited mid-state by the workers.
+    context = multiprocessing.get_context("spawn")
+    seen = set(skip)
+    in_flight = {}
+    sources = iter(_sources(source))
+    exhausted = False
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(skip,)) as pool:
+        while (in_flight or not exhausted) and not errors:
+            while not exhausted and len(in_flight) < workers * 4:
+                try:
+                    name, path = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[pool.submit(_analyze, path)] = name
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = in_flight.pop(future)
+                try:
+                    path, content_hash, analysis = future.result()
+                except Exception as e:
+                    print(f"failed {name}: {e}", file=sys.stderr)
+                    progress.add("failed")
+                    continue
+                if analysis is None or content_hash in seen:
+                    progress.add("skipped")
+                elif isinstance(analysis, str):
+                    print(analysis, file=sys.stderr)
+                    progress.add("failed")
+                else:
+                    seen.add(content_hash)
+                    analyzed.put((name, path, content_hash, analysis))
+                    progress.add("analyzed")
+
+    analyzed.put(_DONE)
+    embedder.join()
+    writer.join()
+    progress.report()
+    if errors:
+        raise errors[0]
+    return progress.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory or zip of resumes against one JD using every core.")
+    parser.add_argument("source", help="Directory (searched recursively) or .zip of resumes")
+    parser.add_argument("--jd", required=True, help="Path to the JD file, e.g. data/jds/sample_jd.pdf")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction/tokenization processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Documents per embedding batch")
+    parser.add_argument("--queue-size", type=int, default=256, help="Analyzed documents buffered ahead of the embedder")
+    parser.add_argument("--write-batch-size", type=int, default=WRITE_BATCH_SIZE)
+    parser.add_argument("--progress-every", type=int, default=500)
+    args = parser.parse_args()
+
+    counts = ingest(args.source, args.jd, args.workers, args.batch_size, args.queue_size, args.write_batch_size, args.progress_every)
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
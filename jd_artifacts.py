@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+
+from extraction import file_sha256
+from scoring import artifact_version, build_jd_artifact
+
+# JD-side scoring artifacts (text, filtered tokens, taxonomy matches,
+# embedding) keyed by the SHA-256 of the JD file, so every applicant reuses
+# the same precomputed work.
+ARTIFACT_DIR = Path("outputs/jd_artifacts")
+ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+
+LRU_SIZE = int(os.environ.get("JD_ARTIFACT_LRU_SIZE", "128"))
+
+_lru = OrderedDict()
+_lock = threading.Lock()
+
+
+def _artifact_path(jd_hash):
+    return ARTIFACT_DIR / f"{jd_hash}.json"
+
+
+def _remember(artifact):
+    with _lock:
+        _lru[artifact["hash"]] = artifact
+        _lru.move_to_end(artifact["hash"])
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def save_jd_artifact(artifact):
+    payload = {
+        "version": artifact["version"],
+        "hash": artifact["hash"],
+        "text": artifact["text"],
+        "tokens": sorted(artifact["tokens"]),
+        "matches": {category: sorted(terms) for category, terms in artifact["matches"].items()},
+        "embedding": artifact["embedding"].tolist(),
+    }
+    path = _artifact_path(artifact["hash"])
+    tmp_path = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+    _remember(artifact)
+
+
+def load_jd_artifact(jd_hash):
+    with _lock:
+        artifact = _lru.get(jd_hash)
+        if artifact is not None:
+            _lru.move_to_end(jd_hash)
+    if artifact is not None:
+        metrics.inc("jd_artifact_requests_total", source="memory")
+        return artifact
+
+    path = _artifact_path(jd_hash)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("version") != artifact_version():
+        return None
+
+    artifact = {
+        "version": payload["version"],
+        "hash": payload["hash"],
+        "text": payload["text"],
+        "tokens": set(payload["tokens"]),
+        "matches": {category: set(terms) for category, terms in payload["matches"].items()},
+        "embedding": np.asarray(payload["embedding"], dtype=np.float32),
+    }
+    _remember(artifact)
+    metrics.inc("jd_artifact_requests_total", source="disk")
+    return artifact
+
+
+def _build_from_snapshot(jd_path):
+    # Extract from a private copy hashed after it was taken, so the artifact
+    # (and the extraction cache) is keyed by the bytes that were actually read
+    # even if the JD is replaced mid-build.
+    snapshot = ARTIFACT_DIR / f".{uuid.uuid4().hex}{Path(jd_path).suffix}"
+    try:
+        shutil.copyfile(jd_path, snapshot)
+        return build_jd_artifact(str(snapshot), file_sha256(snapshot))
+    finally:
+        snapshot.unlink(missing_ok=True)
+
+
+def get_jd_artifact(jd_path, jd_hash=None):
+    """Return the artifact for a JD file, building and storing it on first use.
+
+    `jd_hash` is the content the caller expects. If the file no longer has
+    that content, the artifact for what is on disk now is returned; its
+    "hash" tells the caller which one it got.
+    """
+    artifact = load_jd_artifact(jd_hash) if jd_hash else None
+    if artifact is None:
+        current_hash = file_sha256(jd_path)
+        artifact = load_jd_artifact(current_hash) if current_hash != jd_hash else None
+    if artifact is None:
+        with metrics.timer("jd_artifact_build"):
+            artifact = _build_from_snapshot(jd_path)
+            save_jd_artifact(artifact)
+        metrics.inc("jd_artifact_requests_total", source="built")
+    return artifact
@@ -0,0 +1,136 @@
+import json
+import os
+import queue
+import threading
+import traceback
+
+from database import get_conn, transaction
+
+# Durable scoring queue. Uploads are recorded in the jobs_queue table and a
+# bounded pool of worker threads drains it, so a burst of submissions waits in
+# SQLite instead of tying up request threads. A claimed job holds a lease
+# (claimed_at, claimed_by = pid); a job still running when its lease expires,
+# because its worker died or hung, is claimed again by any worker.
+WORKERS = int(os.environ.get("SCORING_WORKERS", "2"))
+POLL_INTERVAL = float(os.environ.get("SCORING_POLL_INTERVAL", "1.0"))
+LEASE_SECONDS = int(os.environ.get("SCORING_LEASE_SECONDS", "600"))
+# A job rejected by the embedding micro-batcher (queue.Full, or TimeoutError
+# waiting for its embedding) goes back to pending and its worker backs off,
+# doubling from RETRY_BACKOFF_MIN up to RETRY_BACKOFF_MAX.
+RETRY_BACKOFF_MIN = float(os.environ.get("SCORING_RETRY_BACKOFF_MIN", "0.1"))
+RETRY_BACKOFF_MAX = float(os.environ.get("SCORING_RETRY_BACKOFF_MAX", "30"))
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_threads = []
+
+
+def enqueue(student_name, file_path, jd_file, original_filename=None):
+    with transaction() as conn:
+        cur = conn.execute("INSERT INTO jobs_queue(student_name, file_path, jd_file, original_filename) VALUES(?,?,?,?)",
+                           (student_name, file_path, jd_file, original_filename))
+    job_id = cur.lastrowid
+    _wakeup.set()
+    return job_id
+
+
+def get_job(job_id):
+    conn = get_conn()
+    row = conn.execute(
+        "SELECT id, status, result, error, created_at, updated_at FROM jobs_queue WHERE id = ?", (job_id,)
+    ).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return {
+        "job_id": row[0],
+        "status": row[1],
+        "result": json.loads(row[2]) if row[2] else None,
+        "error": row[3],
+        "created_at": row[4],
+        "updated_at": row[5],
+    }
+
+
+def pending_count():
+    conn = get_conn()
+    count = conn.execute("SELECT COUNT(*) FROM jobs_queue WHERE status = 'pending'").fetchone()[0]
+    conn.close()
+    return count
+
+
+def _claim_next():
+    # BEGIN IMMEDIATE takes the write lock up front so two workers (or two
+    # uvicorn processes) can never claim the same row.
+    with transaction() as conn:
+        row = conn.execute(
+            """
+            SELECT id, student_name, file_path, jd_file, original_filename FROM jobs_queue
+            WHERE status = 'pending'
+               OR (status = 'running' AND (claimed_at IS NULL OR claimed_at < datetime('now', ?)))
+            ORDER BY id LIMIT 1
+            """,
+            (f"-{LEASE_SECONDS} seconds",),
+        ).fetchone()
+        if row is None:
+            return None
+        claimed_at = conn.execute("SELECT datetime('now')").fetchone()[0]
+        conn.execute(
+            "UPDATE jobs_queue SET status = 'running', claimed_at = ?, claimed_by = ?, updated_at = CURRENT_TIMESTAMP "
+            "WHERE id = ?",
+            (claimed_at, os.getpid(), row[0]),
+        )
+    return (*row, claimed_at)
+
+
+def _finish(job_id, claimed_at, status, result=None, error=None):
+    # Only while this claim still holds the job: after the lease expired and
+    # another worker took it over, that worker's outcome is the one recorded.
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE jobs_queue SET status = ?, result = ?, error = ?, updated_at = CURRENT_TIMESTAMP "
+            "WHERE id = ? AND status = 'running' AND claimed_at = ? AND claimed_by = ?",
+            (status, json.dumps(result) if result is not None else None, error, job_id, claimed_at, os.getpid()),
+        )
+
+
+def _worker(handler):
+    backoff = 0
+    while not _stop.is_set():
+        job = _claim_next()
+        if job is None:
+            _wakeup.wait(POLL_INTERVAL)
+            _wakeup.clear()
+            continue
+        job_id, student_name, file_path, jd_file, original_filename, claimed_at = job
+        try:
+            result = handler(student_name, file_path, jd_file, original_filename=original_filename)
+            _finish(job_id, claimed_at, "done", result=result)
+            backoff = 0
+        except (queue.Full, TimeoutError) as e:
+            backoff = min(max(backoff * 2, RETRY_BACKOFF_MIN), RETRY_BACKOFF_MAX)
+            reason = "Embedding queue full" if isinstance(e, queue.Full) else str(e)
+            _finish(job_id, claimed_at, "pending", error=f"{reason}; retrying in {backoff:g}s")
+            _stop.wait(backoff)
+        except Exception as e:
+            traceback.print_exc()
+            _finish(job_id, claimed_at, "failed", error=str(e) or type(e).__name__)
+
+
+def start(handler, workers=WORKERS):
+    """Start `workers` threads that run handler(student_name, file_path, jd_file, original_filename=...) per queued job."""
+    if _threads:
+        return
+    _stop.clear()
+    for i in range(workers):
+        thread = threading.Thread(target=_worker, args=(handler,), name=f"scoring-worker-{i}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+
+
+def stop():
+    _stop.set()
+    _wakeup.set()
+    for thread in _threads:
+        thread.join(timeout=5)
+    _threads.clear()
@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from benchmark import REPO_DIR, RESUME_EXTENSIONS, _free_port, _percentiles, _start_app
+
+# Open-loop load generator for capacity planning. Requests are sent on a fixed
+# schedule at the target rate whether or not earlier ones have finished, so an
+# overloaded server shows up as growing latency and errors instead of a
+# silently lower send rate. Latency is measured from each request's scheduled
+# start, which counts time spent waiting for a free connection. It speaks
+# plain HTTP/1.1 over asyncio streams with keep-alive connections, so it
+# needs nothing beyond the standard library and runs fully offline.
+#
+#   python loadtest.py --spawn --rps 20 --duration 30
+#
+# --spawn starts the app in a scratch directory with FAKE_MODELS=1 (see
+# fake_models.py; FAKE_EMBED_LATENCY_MS and friends are passed through), so
+# the numbers are server, database and queue overhead plus the configured
+# inference cost. Add --real-models to load the real models instead.
+CONFIG_KEYS = (
+    "FAKE_MODELS", "FAKE_EMBED_LATENCY_MS", "FAKE_EMBED_LATENCY_PER_TEXT_MS", "EMBED_BACKEND", "EMBED_MICROBATCH",
+    "SCORING_CPU_WORKERS", "SCORING_WORKERS", "UPLOAD_IO_THREADS", "WEB_CONCURRENCY",
+)
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client with a bounded pool of keep-alive connections."""
+
+    def __init__(self, url, connections):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._idle = []
+        self._slots = asyncio.Semaphore(connections)
+
+    async def _exchange(self, reader, writer, head, body):
+        writer.write(head + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            await reader.readline()
+            payload = b"".join(chunks)
+        else:
+            payload = await reader.readexactly(int(headers.get("content-length", "0")))
+        return status, headers, payload
+
+    async def request(self, method, path, body=b"", content_type=None):
+        """Returns (status, body bytes). Raises OSError/asyncio errors on connection failures."""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nContent-Length: {len(body)}\r\n"
+        if content_type:
+            head += f"Content-Type: {content_type}\r\n"
+        head = (head + "\r\n").encode("latin-1")
+        async with self._slots:
+            # An idle connection may have been closed by the server's
+            # keep-alive timeout; that case gets one retry on a fresh one.
+            for reused in (True, False):
+                if reused and not self._idle:
+                    continue
+                reader, writer = self._idle.pop() if reused else await asyncio.open_connection(self.host, self.port)
+                try:
+                    status, headers, payload = await self._exchange(reader, writer, head, body)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if headers.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    self._idle.append((reader, writer))
+                return status, payload
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle = []
+
+
+def multipart(fields, filename, data):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n".encode("utf-8") + data + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Scenario:
+    """Interleaves /upload_resume and /jds requests deterministically at the requested mix."""
+
+    def __init__(self, resume_paths, jd_file, jds_fraction, unique, queued):
+        self.payloads = [(path.name, path.read_bytes()) for path in resume_paths]
+        self.jd_file = jd_file
+        self.jds_fraction = jds_fraction
+        self.unique = unique
+        self.queued = queued
+
+    def kind(self, i):
+        return "jds" if int((i + 1) * self.jds_fraction) > int(i * self.jds_fraction) else "upload_resume"
+
+    def request(self, i):
+        if self.kind(i) == "jds":
+            return "jds", "GET", "/jds", b"", None
+        name, data = self.payloads[i % len(self.payloads)]
+        if self.unique:
+            # Bytes after %%EOF are ignored by PDF readers; new content each
+            # time keeps dedup and the extraction cache from short-circuiting.
+            data += f"\n%loadtest-{uuid.uuid4().hex}\n".encode()
+        fields = {"student_name": Path(name).stem, "jd_file": self.jd_file}
+        if self.queued:
+            fields["queued"] = "true"
+        body, content_type = multipart(fields, name, data)
+        return "upload_resume", "POST", "/upload_resume", body, content_type
+
+
+async def _send(client, scenario, i, scheduled, samples):
+    kind, method, path, body, content_type = scenario.request(i)
+    loop = asyncio.get_running_loop()
+    try:
+        status, _ = await client.request(method, path, body, content_type)
+        outcome = str(status)
+    except Exception as e:
+        outcome = type(e).__name__
+    samples.append((kind, outcome, loop.time() - scheduled))
+
+
+async def run_load(client, scenario, rps, duration, max_inflight):
+    """Send rps * duration requests on a fixed schedule; returns (samples, dropped, elapsed seconds)."""
+    loop = asyncio.get_running_loop()
+    samples, inflight, dropped = [], set(), Counter()
+    started = loop.time()
+    for i in range(int(rps * duration)):
+        scheduled = started + i / rps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            dropped[scenario.kind(i)] += 1
+            continue
+        task = asyncio.create_task(_send(client, scenario, i, scheduled, samples))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        await asyncio.wait(inflight)
+    return samples, dropped, loop.time() - started
+
+
+def summarize(samples, dropped, elapsed):
+    results, errors = {}, Counter()
+    for kind in sorted({kind for kind, _, _ in samples} | set(dropped)) + ["overall"]:
+        selected = [(outcome, seconds) for k, outcome, seconds in samples if kind in (k, "overall")]
+        ok = [seconds for outcome, seconds in selected if outcome.startswith("2")]
+        failed = len(selected) - len(ok) + (sum(dropped.values()) if kind == "overall" else dropped[kind])
+        attempted = len(selected) + (sum(dropped.values()) if kind == "overall" else dropped[kind])
+        results[kind] = {
+            **(_percentiles(ok) if ok else {}),
+            "requests": attempted,
+            "ok": len(ok),
+            "errors": failed,
+            "error_rate": round(failed / attempted, 4) if attempted else 0.0,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        }
+    for kind, outcome, _ in samples:
+        if not outcome.startswith("2"):
+            errors[f"{kind}:{outcome}"] += 1
+    for kind, count in dropped.items():
+        errors[f"{kind}:dropped"] += count
+    return results, dict(errors)
+
+
+async def load_test(url, args, resume_paths, jd_path):
+    client = HttpClient(url, args.connections)
+    try:
+        body, content_type = multipart({"role": "Load test"}, jd_path.name, jd_path.read_bytes())
+        status, payload = await client.request("POST", "/upload_jd", body, content_type)
+        if status != 200:
+            raise RuntimeError(f"Posting the JD failed with {status}: {payload[:200]!r}")
+        scenario = Scenario(resume_paths, jd_path.name, args.jds_fraction, not args.no_unique, args.queued)
+        if args.warmup:
+            await run_load(client, scenario, min(args.rps, 10), args.warmup, args.max_inflight)
+        return await run_load(client, scenario, args.rps, args.duration, args.max_inflight)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay resume uploads and /jds reads against the API at a target request rate.")
+    parser.add_argument("--url", help="Running API to test, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="Start a throwaway API in a scratch directory instead")
+    parser.add_argument("--real-models", action="store_true", help="With --spawn, load the real models instead of FAKE_MODELS")
+    parser.add_argument("--resumes", default=str(REPO_DIR / "data/resumes"))
+    parser.add_argument("--jd", default=str(REPO_DIR / "data/jds/sample_jd.pdf"))
+    parser.add_argument("--rps", type=float, default=10.0, help="Target requests per second (all endpoints)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of unmeasured load first (0 to skip)")
+    parser.add_argument("--jds-fraction", type=float, default=0.5, help="Share of requests that are GET /jds")
+    parser.add_argument("--queued", action="store_true", help="Upload with queued=true (measures enqueueing, not scoring)")
+    parser.add_argument("--no-unique", action="store_true", help="Replay identical bytes, letting dedup answer repeats")
+    parser.add_argument("--connections", type=int, default=64, help="Keep-alive connections to the API")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="Requests beyond this many outstanding are dropped and counted as errors")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+    if bool(args.url) == bool(args.spawn):
+        parser.error("Pass exactly one of --url or --spawn")
+    if not 0 <= args.jds_fraction <= 1:
+        parser.error("--jds-fraction must be between 0 and 1")
+
+    resume_paths = sorted(
+        path.resolve() for path in Path(args.resumes).iterdir()
+        if path.is_file() and path.name.lower().endswith(RESUME_EXTENSIONS)
+    )
+    if not resume_paths:
+        parser.error(f"No resumes found in {args.resumes}")
+    jd_path = Path(args.jd).resolve()
+
+    process, workdir = None, None
+    env = dict(os.environ)
+    try:
+        if args.spawn:
+            workdir = Path(tempfile.mkdtemp(prefix="resume-loadtest-"))
+            (workdir / "data").mkdir()
+            shutil.copy(REPO_DIR / "data/taxonomy.json", workdir / "data/taxonomy.json")
+            if not args.real_models:
+                env["FAKE_MODELS"] = "1"
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_DIR), env.get("PYTHONPATH")]))
+            process, url = _start_app(workdir, _free_port(), env)
+        else:
+            url = args.url.rstrip("/")
+        samples, dropped, elapsed = asyncio.run(load_test(url, args, resume_paths, jd_path))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results, errors = summarize(samples, dropped, elapsed)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "url": "spawned" if args.spawn else url,
+        "target": {"rps": args.rps, "duration_s": args.duration, "jds_fraction": args.jds_fraction, "queued": args.queued},
+        "elapsed_s": round(elapsed, 3),
+        "config": {key: env.get(key) for key in CONFIG_KEYS} if args.spawn else None,
+        "results": results,
+        "errors": errors,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if results["overall"]["errors"]:
+        print(f"{results['overall']['errors']} of {results['overall']['requests']} requests failed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# In-process instrumentation: counters, gauges and latency histograms rendered
+# in the Prometheus text format at /metrics. Recording is a lock, a bisect and
+# two additions, so it stays on in production. Stage timers also feed the
+# current request's Server-Timing header when METRICS_SERVER_TIMING=1.
+SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "1") == "1"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_help = {}
+_counters = {}
+_histograms = {}
+_gauges = {}
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def describe(name, kind, text):
+    _help[name] = (kind, text)
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    index = bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+        histogram[0][index] += 1
+        histogram[1] += seconds
+
+
+def gauge(name, text, fn):
+    """Register a gauge whose value is read from fn() at scrape time."""
+    describe(name, "gauge", text)
+    _gauges[name] = fn
+
+
+@contextmanager
+def timer(stage):
+    """Time a pipeline stage into stage_seconds{stage=...} and the current request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("stage_seconds", elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def start_request():
+    """Begin collecting stage timings for the current request; returns the dict they accumulate in."""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings, total):
+    parts = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: (list(counts), total) for key, (counts, total) in _histograms.items()}
+
+    lines = []
+    seen = set()
+
+    def header(name, default_kind):
+        if name not in seen:
+            seen.add(name)
+            kind, text = _help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {value}")
+
+    for (name, labels), (counts, total) in sorted(histograms.items()):
+        header(name, "histogram")
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {total}")
+        lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    for name, fn in sorted(_gauges.items()):
+        try:
+            value = fn()
+        except Exception:
+            continue
+        header(name, "gauge")
+        lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+describe("stage_seconds", "histogram", "Time spent in each scoring pipeline stage.")
+describe("http_request_seconds", "histogram", "HTTP request latency by route.")
+describe("documents_processed_total", "counter", "Documents scored or built into JD artifacts.")
+describe("extracted_bytes_total", "counter", "UTF-8 bytes of text produced by extraction (cache misses only).")
+describe("text_cache_requests_total", "counter", "Extraction cache lookups by result.")
+describe("jd_artifact_requests_total", "counter", "JD artifact lookups by where they were served from.")
@@ -0,0 +1,148 @@
+import gc
+import os
+import threading
+import time
+
+# Lazily loaded, process-wide model registry. Nothing heavy is imported until a
+# model is first requested, so importing app.py (and /health) stays fast.
+# MODEL_WARMUP controls eager loading:
+#   none    - load on first use (default)
+#   startup - load in the FastAPI startup hook of each worker
+#   preload - load at import time; with gunicorn's preload_app the master loads
+#             once and forked workers share the weights copy-on-write
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "none")
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+EMBED_MODEL = os.environ.get("EMBED_MODEL", "all-MiniLM-L6-v2")
+# Scoring only reads token text, is_alpha and the stop-word list, all of which
+# come from the tokenizer. The statistical components are skipped unless
+# SPACY_FULL_PIPELINE=1.
+SPACY_FULL_PIPELINE = os.environ.get("SPACY_FULL_PIPELINE", "0") == "1"
+# Sentence-embedding backend, all behind the same SentenceTransformer.encode API:
+#   torch - fp32 PyTorch (default)
+#   int8  - PyTorch with nn.Linear layers dynamically quantized to int8
+#   onnx  - ONNX Runtime (pip install "sentence-transformers[onnx]");
+#           EMBED_ONNX_FILE picks a file from the model repo, e.g.
+#           onnx/model_qint8_avx512_vnni.onnx for a pre-quantized export
+# Run embedding_parity.py before switching to check drift against fp32.
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", "torch")
+EMBED_BACKENDS = ("torch", "int8", "onnx")
+EMBED_ONNX_FILE = os.environ.get("EMBED_ONNX_FILE")
+# FAKE_MODELS=1 swaps both models for the offline stand-ins in fake_models.py,
+# for load tests that separate server overhead from inference cost.
+FAKE_MODELS = os.environ.get("FAKE_MODELS", "0") == "1"
+SPACY_LEXICAL_EXCLUDE = ["tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+_loaders = {}
+_models = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def register(name, loader):
+    _loaders[name] = loader
+
+
+def get(name):
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        if name not in _models:
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            _models[name] = _loaders[name]()
+            _stats[name] = {
+                "load_seconds": round(time.perf_counter() - started, 3),
+                "rss_delta_bytes": _rss_bytes() - rss_before,
+            }
+        return _models[name]
+
+
+def warm_up(names=None):
+    for name in names or list(_loaders):
+        get(name)
+
+
+def preload():
+    """Load every model and freeze the GC so forked workers keep sharing the pages."""
+    warm_up()
+    # Objects created so far are moved to a permanent generation; otherwise the
+    # collector touching their headers after fork would copy every page.
+    gc.freeze()
+
+
+def stats():
+    return {
+        "warmup": MODEL_WARMUP,
+        "embed_backend": EMBED_BACKEND,
+        "fake_models": FAKE_MODELS,
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "models": {
+            name: {"loaded": name in _models, **_stats.get(name, {})}
+            for name in _loaders
+        },
+    }
+
+
+def _load_nlp():
+    if FAKE_MODELS:
+        import fake_models
+        return fake_models.load_nlp()
+    import spacy
+    if SPACY_FULL_PIPELINE:
+        return spacy.load(SPACY_MODEL)
+    return spacy.load(SPACY_MODEL, exclude=SPACY_LEXICAL_EXCLUDE)
+
+
+def load_embed_backend(backend=EMBED_BACKEND):
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        return SentenceTransformer(EMBED_MODEL)
+    if backend == "int8":
+        import torch
+        model = SentenceTransformer(EMBED_MODEL, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    if backend == "onnx":
+        model_kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else None
+        return SentenceTransformer(EMBED_MODEL, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+    raise ValueError(f"Unknown EMBED_BACKEND {backend!r}; expected one of {', '.join(EMBED_BACKENDS)}")
+
+
+def embed_model_id(backend=EMBED_BACKEND):
+    """Identifies the vectors the embedding model produces; part of the scoring and artifact versions."""
+    if FAKE_MODELS:
+        return "fake-embedder"
+    if backend == "torch":
+        return EMBED_MODEL
+    if backend == "onnx" and EMBED_ONNX_FILE:
+        return f"{EMBED_MODEL}+onnx:{EMBED_ONNX_FILE}"
+    return f"{EMBED_MODEL}+{backend}"
+
+
+def _load_embed_model():
+    if FAKE_MODELS:
+        import fake_models
+        return fake_models.FakeEmbedder()
+    return load_embed_backend(EMBED_BACKEND)
+
+
+register("nlp", _load_nlp)
+register("embed", _load_embed_model)
+
+
+def get_nlp():
+    return get("nlp")
+
+
+def get_embed_model():
+    return get("embed")
@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+from scipy import sparse
+
+import scoring
+from database import get_conn
+from jd_artifacts import get_jd_artifact
+
+# Every open posting stacked into two matrices: normalized JD embeddings
+# (jobs x dim) and binary JD keyword vectors (jobs x vocabulary, sparse). One
+# resume is scored against all postings with a dense matrix-vector product
+# and a sparse column sum, so latency barely moves as postings grow. A change
+# to jobs builds a new index, reusing the JD features of postings whose
+# content hash is unchanged, and swaps it in whole; callers keep the index
+# they were handed. Postings whose JD file is missing are left out.
+_lock = threading.Lock()
+_index = {"key": None, "jobs": [], "features": {}}
+
+
+def _open_jobs(conn):
+    return conn.execute(
+        "SELECT role, jd_file, jd_hash FROM jobs WHERE id IN (SELECT MAX(id) FROM jobs GROUP BY jd_file) ORDER BY id"
+    ).fetchall()
+
+
+def _features(jd_file, jd_hash, cached):
+    if jd_hash in cached:
+        return cached[jd_hash]
+    try:
+        artifact = get_jd_artifact(f"data/jds/{jd_file}", jd_hash)
+    except FileNotFoundError:
+        return None
+    return {
+        "tokens": artifact["tokens"],
+        "matches": artifact["matches"],
+        "embedding": scoring.unit_vector(artifact["embedding"]).astype(np.float32),
+    }
+
+
+def _build(jobs, cached):
+    postings, features = [], {}
+    for role, jd_file, jd_hash in jobs:
+        jd = _features(jd_file, jd_hash, cached)
+        if jd is not None:
+            postings.append({"role": role, "jd_file": jd_file})
+            features[jd_hash] = jd
+    by_posting = [features[jd_hash] for _, _, jd_hash in jobs if jd_hash in features]
+    if not postings:
+        return {"jobs": [], "features": features}
+
+    vocabulary = {}
+    rows, cols = [], []
+    for row, jd in enumerate(by_posting):
+        for token in jd["tokens"]:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    keywords = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(by_posting), max(len(vocabulary), 1))
+    ).tocsc()
+
+    return {
+        "jobs": postings,
+        "features": features,
+        "matches": [jd["matches"] for jd in by_posting],
+        "vocabulary": vocabulary,
+        "keywords": keywords,
+        "keyword_counts": np.array([len(jd["tokens"]) for jd in by_posting], dtype=np.float32),
+        "embeddings": np.stack([jd["embedding"] for jd in by_posting]),
+    }
+
+
+def _get_index():
+    global _index
+    conn = get_conn()
+    jobs = _open_jobs(conn)
+    conn.close()
+    key = tuple(jobs)
+    with _lock:
+        if _index["key"] != key:
+            _index = {**_build(jobs, _index["features"]), "key": key}
+        return _index
+
+
+def recommend(resume_path, content_hash=None, limit=10):
+    """Score one resume against every open posting and return the best `limit` matches."""
+    index = _get_index()
+    if not index["jobs"]:
+        return []
+    features = scoring.resume_features(resume_path, content_hash)
+
+    columns = [index["vocabulary"][token] for token in features["tokens"] if token in index["vocabulary"]]
+    common = np.asarray(index["keywords"][:, columns].sum(axis=1)).ravel()
+    keyword_overlap = common / np.maximum(index["keyword_counts"], 1)
+    similarities = index["embeddings"] @ features["embedding"]
+    coverage = scoring.content_coverage(features["matches"])
+    totals = scoring.combine_components(keyword_overlap, similarities, coverage)
+
+    limit = min(limit, len(totals))
+    best = np.argpartition(-totals, limit - 1)[:limit]
+    best = best[np.argsort(-totals[best])]
+    return [
+        {
+            **index["jobs"][i],
+            "score": float(totals[i]),
+            "verdict": scoring.verdict_for(float(totals[i])),
+            "similarity": float(similarities[i]),
+            "missing": scoring.missing_items(index["matches"][i], features["matches"]),
+        }
+        for i in best
+    ]
@@ -0,0 +1,61 @@
+import argparse
+import json
+
+import scoring
+from database import init_db, get_conn, transaction
+
+# Recompute relevance_score and verdict for every stored result from its raw
+# components and the current weights/thresholds in scoring.py. This is one
+# set-based UPDATE, so retuning weights never requires re-reading PDFs or
+# re-running the models. Must stay in step with scoring.combine_components.
+# Each run is logged in rescore_runs with the weights it applied.
+RESCORE_SQL = """
+    UPDATE resumes
+    SET relevance_score = MIN((keyword_overlap * :hard + similarity * :sem + content_coverage * :content) * 100, 100.0),
+        verdict = CASE
+            WHEN MIN((keyword_overlap * :hard + similarity * :sem + content_coverage * :content) * 100, 100.0) >= :strong THEN 'Strong Match'
+            WHEN MIN((keyword_overlap * :hard + similarity * :sem + content_coverage * :content) * 100, 100.0) >= :moderate THEN 'Moderate Match'
+            ELSE 'Weak Match'
+        END
+    WHERE keyword_overlap IS NOT NULL AND similarity IS NOT NULL AND content_coverage IS NOT NULL
+"""
+
+
+def current_weights():
+    return {
+        "hard": scoring.HARD_SCORE_WEIGHT,
+        "sem": scoring.SEM_SCORE_WEIGHT,
+        "content": scoring.CONTENT_BONUS_WEIGHT,
+        "strong": scoring.STRONG_MATCH_THRESHOLD,
+        "moderate": scoring.MODERATE_MATCH_THRESHOLD,
+    }
+
+
+def rescore(conn):
+    """Re-derive totals and verdicts for all rows with stored components; returns the number updated."""
+    params = current_weights()
+    with transaction(conn):
+        updated = conn.execute(RESCORE_SQL, params).rowcount
+        conn.execute("INSERT INTO rescore_runs(weights, updated) VALUES(?, ?)", (json.dumps(params), updated))
+    return updated
+
+
+def last_run(conn):
+    """The most recent rescore run ({"weights", "updated", "created_at"}), or None."""
+    row = conn.execute("SELECT weights, updated, created_at FROM rescore_runs ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        return None
+    return {"weights": json.loads(row[0]), "updated": row[1], "created_at": row[2]}
+
+
+def main():
+    argparse.ArgumentParser(description="Recompute every stored score and verdict from its saved components.").parse_args()
+    init_db()
+    conn = get_conn()
+    updated = rescore(conn)
+    conn.close()
+    print(f"Rescored {updated} resumes with {json.dumps(current_weights())}")
+
+
+if __name__ == "__main__":
+    main()
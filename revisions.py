@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import threading
+import traceback
+
+import numpy as np
+
+import embedding_index
+import metrics
+import scoring
+from database import init_db, get_conn, transaction
+from extraction import extract_text
+from jd_artifacts import get_jd_artifact
+
+# JD revisions. Each posting (jd_file) keeps its history in jobs, one row per
+# revision, and a new row is only added when the file's content hash or the
+# role changes. When the content changes, the applications to that posting are
+# re-scored in the background against the new revision's artifact, reusing
+# the stored resume text and the embeddings in the resume index, so the cost
+# is proportional to that posting's applicants. Re-scoring walks the posting's
+# rows whose jd_content_hash differs from the latest revision, so it is
+# idempotent and picks up where it stopped after a restart. Rows that cannot
+# be re-scored (unreadable text, or another row for the same resume already
+# holds the revision) are marked with rescore_skipped_for and counted apart
+# from the pending ones. Freshly encoded embeddings are appended to the
+# resume index before their rows are updated.
+BATCH_SIZE = int(os.environ.get("JD_RESCORE_BATCH_SIZE", "256"))
+
+_lock = threading.Lock()
+_running = {}  # jd_file -> whether another pass was requested while running
+
+
+def latest_revision(conn, jd_file):
+    row = conn.execute(
+        "SELECT id, revision, role, jd_hash, created_at, rescored_at FROM jobs WHERE jd_file = ? ORDER BY id DESC LIMIT 1",
+        (jd_file,),
+    ).fetchone()
+    if row is None:
+        return None
+    return {"id": row[0], "revision": row[1], "role": row[2], "jd_hash": row[3], "created_at": row[4], "rescored_at": row[5]}
+
+
+def record_revision(conn, role, jd_file, jd_hash):
+    """Add a revision of `jd_file` unless its content and role are unchanged.
+
+    Returns (revision number, whether the content changed since the previous
+    revision). Only a content change leaves the revision waiting for a re-score.
+    """
+    with transaction(conn):
+        latest = latest_revision(conn, jd_file)
+        if latest is not None and latest["jd_hash"] == jd_hash and latest["role"] == role:
+            return latest["revision"], False
+        revision = latest["revision"] + 1 if latest is not None else 1
+        content_changed = latest is not None and latest["jd_hash"] != jd_hash
+        conn.execute(
+            "INSERT INTO jobs(role, jd_file, jd_hash, revision, rescored_at) "
+            "VALUES(?, ?, ?, ?, CASE WHEN ? THEN NULL ELSE CURRENT_TIMESTAMP END)",
+            (role, jd_file, jd_hash, revision, content_changed),
+        )
+    return revision, content_changed
+
+
+def history(conn, jd_file):
+    """All revisions of a posting, newest first, plus how many applications still await re-scoring."""
+    rows = conn.execute(
+        "SELECT revision, role, jd_hash, created_at, rescored_at FROM jobs WHERE jd_file = ? ORDER BY id DESC", (jd_file,)
+    ).fetchall()
+    if not rows:
+        return None
+    pending, skipped = conn.execute(
+        """
+        SELECT COALESCE(SUM(rescore_skipped_for IS NOT ?1), 0), COALESCE(SUM(rescore_skipped_for IS ?1), 0)
+        FROM resumes WHERE jd_file = ?2 AND jd_content_hash IS NOT ?1
+        """,
+        (rows[0][2], jd_file),
+    ).fetchone()
+    return {
+        "jd_file": jd_file,
+        "pending_rescore": pending,
+        "skipped_rescore": skipped,
+        "revisions": [
+            {"revision": row[0], "role": row[1], "jd_hash": row[2], "created_at": row[3], "rescored_at": row[4]}
+            for row in rows
+        ],
+    }
+
+
+def _embeddings(rows, texts, version):
+    """Stored index vectors where the row was scored with the current pipeline, fresh encodes otherwise.
+
+    Returns the stacked embeddings and the positions that were encoded.
+    """
+    stored = embedding_index.vectors_for([row[0] for row in rows if row[3] == version])
+    missing = [i for i, row in enumerate(rows) if int(row[0]) not in stored]
+    encoded = scoring.embed_batch([texts[i] for i in missing]) if missing else []
+    embeddings = [stored.get(int(row[0])) for row in rows]
+    for i, embedding in zip(missing, encoded):
+        embeddings[i] = embedding
+    return np.stack(embeddings).astype(np.float32), missing
+
+
+def rescore_posting(jd_file, batch_size=BATCH_SIZE):
+    """Re-score every application to `jd_file` against its latest revision; returns the number of rows updated."""
+    conn = get_conn()
+    latest = latest_revision(conn, jd_file)
+    conn.close()
+    if latest is None:
+        return 0
+    jd_artifact = get_jd_artifact(f"data/jds/{jd_file}", latest["jd_hash"])
+    if jd_artifact["hash"] != latest["jd_hash"]:
+        return 0  # the file has changed since; the pass for its newer revision re-scores
+    version = scoring.scoring_version()
+
+    updated, last_id = 0, 0
+    while True:
+        conn = get_conn()
+        rows = conn.execute(
+            """
+            SELECT r.id, r.content_hash, r.file_path, r.scoring_version, t.text
+            FROM resumes r LEFT JOIN resume_texts t ON t.content_hash = r.content_hash
+            WHERE r.jd_file = ?1 AND r.jd_content_hash IS NOT ?2 AND r.rescore_skipped_for IS NOT ?2 AND r.id > ?3
+            ORDER BY r.id LIMIT ?4
+            """,
+            (jd_file, latest["jd_hash"], last_id, batch_size),
+        ).fetchall()
+        conn.close()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        with metrics.timer("jd_rescore"):
+            texts = [text if text is not None else extract_text(path, content_hash) for _, content_hash, path, _, text in rows]
+            usable = [(row, text) for row, text in zip(rows, texts) if not text.startswith("[ERROR]")]
+            unreadable = [row[0] for row, text in zip(rows, texts) if text.startswith("[ERROR]")]
+            rows, texts = [row for row, _ in usable], [text for _, text in usable]
+            results = []
+            if rows:
+                embeddings, encoded = _embeddings(rows, texts, version)
+                results = scoring.score_analyzed(jd_artifact, scoring.lexical_analysis_batch(texts), embeddings)
+                embedding_index.append([rows[i][0] for i in encoded], embeddings[encoded])
+
+        conn = get_conn()
+        with transaction(conn):
+            skipped = list(unreadable)
+            for row, result in zip(rows, results):
+                # Another row for the same resume may already hold this JD
+                # revision (the dedup index); that one wins and this one is skipped.
+                cur = conn.execute(
+                    """
+                    UPDATE OR IGNORE resumes
+                    SET jd_content_hash = ?, scoring_version = ?, relevance_score = ?, verdict = ?, missing = ?,
+                        keyword_overlap = ?, similarity = ?, content_coverage = ?, rescore_skipped_for = NULL
+                    WHERE id = ? AND jd_content_hash IS NOT ?
+                    """,
+                    (latest["jd_hash"], version, result["score"], result["verdict"], json.dumps(result["missing"]),
+                     result["components"]["keyword_overlap"], result["components"]["similarity"],
+                     result["components"]["content_coverage"], row[0], latest["jd_hash"]),
+                )
+                if cur.rowcount:
+                    updated += 1
+                else:
+                    skipped.append(row[0])
+            conn.executemany(
+                "UPDATE resumes SET rescore_skipped_for = ? WHERE id = ? AND jd_content_hash IS NOT ?",
+                [(latest["jd_hash"], resume_id, latest["jd_hash"]) for resume_id in skipped],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO resume_texts(content_hash, text) VALUES(?, ?)",
+                [(row[1], text) for row, text in zip(rows, texts) if row[4] is None and row[1]],
+            )
+            newer = latest_revision(conn, jd_file)
+        conn.close()
+        metrics.inc("documents_processed_total", len(results), kind="rescore")
+        if newer["jd_hash"] != latest["jd_hash"]:
+            return updated  # superseded mid-run; the pass for the newer revision takes over
+
+    conn = get_conn()
+    with transaction(conn):
+        conn.execute("UPDATE jobs SET rescored_at = CURRENT_TIMESTAMP WHERE id = ? AND rescored_at IS NULL", (latest["id"],))
+    conn.close()
+    return updated
+
+
+def _run(jd_file):
+    while True:
+        try:
+            rescore_posting(jd_file)
+        except Exception:
+            traceback.print_exc()
+        with _lock:
+            if not _running[jd_file]:
+                del _running[jd_file]
+                return
+            _running[jd_file] = False
+
+
+def start(jd_file):
+    """Re-score `jd_file` on a background thread; a request during a running pass queues one more pass."""
+    with _lock:
+        if jd_file in _running:
+            _running[jd_file] = True
+            return
+        _running[jd_file] = False
+    threading.Thread(target=_run, args=(jd_file,), daemon=True, name=f"jd-rescore-{jd_file}").start()
+
+
+def resume_pending():
+    """Start re-scoring every posting whose latest revision has not been settled yet."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT jd_file FROM jobs WHERE rescored_at IS NULL AND id IN (SELECT MAX(id) FROM jobs GROUP BY jd_file)"
+    ).fetchall()
+    conn.close()
+    for (jd_file,) in rows:
+        start(jd_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score the applications to a posting against its latest JD revision.")
+    parser.add_argument("jd_file", help="Posting to re-score, e.g. sample_jd.pdf")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    init_db()
+    print(f"Rescored {rescore_posting(args.jd_file, args.batch_size)} applications")
+
+
+if __name__ == "__main__":
+    main()
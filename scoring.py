@@ -1,96 +1,222 @@
-import fitz  
-import docx2txt
-import spacy
+import os
 import random
-from sentence_transformers import SentenceTransformer, util
-from spacy.lang.en.stop_words import STOP_WORDS
-
-nlp = spacy.load("en_core_web_sm")
-embed_model = SentenceTransformer('all-MiniLM-L6-v2')
-
-def extract_text(file_path):
-    ext = file_path.lower()
-    try:
-        if ext.endswith(".pdf"):
-            doc = fitz.open(file_path)
-            return "\n".join([page.get_text() for page in doc])
-        elif ext.endswith(".docx"):
-            return docx2txt.process(file_path)
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import chunking
+import embedding_service
+import metrics
+import taxonomy
+from extraction import extract_text, file_sha256
+from models import get_nlp, get_embed_model, embed_model_id
+
+# Bulk paths tokenize with nlp.pipe; n_process > 1 forks tokenizer workers.
+LEXICAL_BATCH_SIZE = int(os.environ.get("LEXICAL_BATCH_SIZE", "64"))
+LEXICAL_N_PROCESS = int(os.environ.get("LEXICAL_N_PROCESS", "1"))
+
+# Bump whenever the shape or meaning of a JD artifact changes so stale
+# on-disk artifacts are rebuilt instead of reused.
+ARTIFACT_VERSION = 2
+
+# Bump whenever the way the score components are computed changes
+# (extraction, tokenization, matching, similarity). Stored results are only
+# reused for the same version. Weights and thresholds are not part of it:
+# changing them only needs rescore.py, which re-weights the stored components.
+SCORING_REVISION = 1
+
+def _filter_tokens(doc, stop_words):
+    return {token.text for token in doc if token.is_alpha and token.text not in stop_words}
+
+def lexical_tokens(text):
+    nlp = get_nlp()
+    # Same set as spacy.lang.en.stop_words.STOP_WORDS, read from the loaded
+    # pipeline so importing this module doesn't pull in spaCy.
+    stop_words = nlp.Defaults.stop_words
+    # Only the tokenizer runs: text, is_alpha and stop words are all lexical,
+    # so the token set is identical to running the full pipeline.
+    return _filter_tokens(nlp.tokenizer(text.lower()), stop_words)
+
+def lexical_analysis(text):
+    """Tokenize once and return (filtered token set, taxonomy matches) for `text`."""
+    nlp = get_nlp()
+    with metrics.timer("tokenize"):
+        doc = nlp.tokenizer(text.lower())
+        tokens = _filter_tokens(doc, nlp.Defaults.stop_words)
+    with metrics.timer("taxonomy_match"):
+        return tokens, taxonomy.match(doc)
+
+def lexical_analysis_batch(texts, batch_size=LEXICAL_BATCH_SIZE, n_process=LEXICAL_N_PROCESS):
+    nlp = get_nlp()
+    stop_words = nlp.Defaults.stop_words
+    docs = nlp.pipe((text.lower() for text in texts), batch_size=batch_size, n_process=n_process, disable=nlp.pipe_names)
+    return [(_filter_tokens(doc, stop_words), taxonomy.match(doc)) for doc in docs]
+
+def _embedding_version():
+    # Unchunked embeddings keep the pre-chunking version strings so existing
+    # results and artifacts stay valid.
+    if not chunking.ENABLED:
+        return embed_model_id()
+    return f"{embed_model_id()}:{chunking.version()}"
+
+def scoring_version():
+    return f"{SCORING_REVISION}:{taxonomy.version()}:{_embedding_version()}"
+
+def artifact_version():
+    # Artifacts embed taxonomy matches and a JD embedding, so a taxonomy
+    # release or a different embedding setup invalidates them too.
+    return f"{ARTIFACT_VERSION}:{taxonomy.version()}:{_embedding_version()}"
+
+def build_jd_artifact(jd_path, jd_hash=None):
+    """Extract, tokenize and embed a JD once so it can be reused for every applicant."""
+    jd_hash = jd_hash or file_sha256(jd_path)
+    with metrics.timer("extract"):
+        jd_text = extract_text(jd_path, jd_hash)
+    jd_tokens, jd_matches = lexical_analysis(jd_text)
+    with metrics.timer("jd_embed"):
+        if chunking.ENABLED:
+            jd_emb = chunking.embed_document(jd_text)
         else:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-    except Exception as e:
-        return f"[ERROR] Could not extract text from {file_path}: {e}"
-
-def score_resume(resume_path, jd_path):
-    resume_text = extract_text(resume_path)
-    jd_text = extract_text(jd_path)
-
-   
-    jd_doc = nlp(jd_text.lower())
-    resume_doc = nlp(resume_text.lower())
-
-    jd_tokens = {token.text for token in jd_doc if token.is_alpha and token.text not in STOP_WORDS}
-    resume_tokens = {token.text for token in resume_doc if token.is_alpha and token.text not in STOP_WORDS}
-
-    common_tokens = jd_tokens.intersection(resume_tokens)
-   
-    hard_score_weight = 0.4
-    hard_score = len(common_tokens) / max(len(jd_tokens), 1) * 100 * hard_score_weight
-
-  
-    resume_emb = embed_model.encode(resume_text, convert_to_tensor=True)
-    jd_emb = embed_model.encode(jd_text, convert_to_tensor=True)
-    
-    sem_score_weight = 0.5
-    sem_score = float(util.cos_sim(resume_emb, jd_emb)[0][0]) * 100 * sem_score_weight
-
-
-    all_skills = {
-        "python", "sql", "machine learning", "data analysis", "nlp", "power bi", "excel", "tableau",
-        "tensorflow", "keras", "pytorch", "scikit-learn", "pandas", "numpy", "matplotlib", "seaborn",
-        "r", "sas", "spss", "statistics", "feature engineering", "data visualization",
-        "big data", "hadoop", "spark", "apache kafka", "aws", "azure", "gcp",
-        "docker", "kubernetes", "git", "ci/cd", "agile", "scrum",
-        "deep learning", "computer vision", "time series analysis", "natural language processing"
-    }
-    all_certifications = {
-        "aws certified", "pmp", "scrum master", "cisco", "azure fundamentals", "google data analytics"
+            jd_emb = get_embed_model().encode(jd_text, convert_to_numpy=True).astype("float32")
+    metrics.inc("documents_processed_total", kind="jd")
+    return {
+        "version": artifact_version(),
+        "hash": jd_hash,
+        "text": jd_text,
+        "tokens": jd_tokens,
+        "matches": jd_matches,
+        "embedding": jd_emb,
     }
-    all_projects = {
-        "sentiment analysis", "predictive modeling", "churn prediction", "stock price forecasting", "image classification"
-    }
-
-
-    matched_skills = resume_tokens.intersection(all_skills)
-    matched_certifications = resume_tokens.intersection(all_certifications)
-    matched_projects = resume_tokens.intersection(all_projects)
-
-    content_bonus_weight = 0.3
-    content_bonus = (len(matched_skills) / max(len(all_skills), 1) + len(matched_certifications) / max(len(all_certifications), 1) + len(matched_projects) / max(len(all_projects), 1)) / 3 * 100 * content_bonus_weight
-
-  
-    total_score = min(hard_score + sem_score + content_bonus, 100.0)
 
-
-    if total_score >= 30:
-        verdict = "Strong Match"
-    elif total_score >= 22:
-        verdict = "Moderate Match"
+HARD_SCORE_WEIGHT = 0.4
+SEM_SCORE_WEIGHT = 0.5
+CONTENT_BONUS_WEIGHT = 0.3
+STRONG_MATCH_THRESHOLD = 30
+MODERATE_MATCH_THRESHOLD = 22
+
+def verdict_for(total_score):
+    if total_score >= STRONG_MATCH_THRESHOLD:
+        return "Strong Match"
+    elif total_score >= MODERATE_MATCH_THRESHOLD:
+        return "Moderate Match"
     else:
-        verdict = "Weak Match"
-
-    missing_keywords = jd_tokens - resume_tokens
-
-    missing_skills = list(missing_keywords.intersection(all_skills))
-    missing_certifications = list(missing_keywords.intersection(all_certifications))
-    missing_projects = list(missing_keywords.intersection(all_projects))
+        return "Weak Match"
+
+def content_coverage(resume_matches):
+    # Each category's coverage saturates at its bonus_target (the size of the
+    # original hand-picked list), so a larger taxonomy doesn't dilute the bonus.
+    targets = taxonomy.bonus_targets()
+    coverage = [
+        min(len(resume_matches[category]) / max(targets[category], 1), 1.0)
+        for category in taxonomy.CATEGORIES
+    ]
+    return sum(coverage) / len(coverage)
+
+def missing_items(jd_matches, resume_matches):
+    missing_skills = sorted(jd_matches["skills"] - resume_matches["skills"])
+    missing_certifications = sorted(jd_matches["certifications"] - resume_matches["certifications"])
+    missing_projects = sorted(jd_matches["projects"] - resume_matches["projects"])
 
     num_skills_to_show = min(max(5, len(missing_skills)), len(missing_skills))
     selected_skills = random.sample(missing_skills, num_skills_to_show)
 
-    return total_score, verdict, {
+    return {
         "skills": selected_skills,
         "certifications": missing_certifications,
         "projects": missing_projects
     }
+
+def combine_components(keyword_overlap, similarity, content_coverage):
+    """Weighted total from the raw components; rescore.py mirrors this in SQL.
+
+    Works elementwise on numpy arrays too (recommend.py scores all postings at once).
+    """
+    weighted = keyword_overlap * HARD_SCORE_WEIGHT + similarity * SEM_SCORE_WEIGHT + content_coverage * CONTENT_BONUS_WEIGHT
+    return np.minimum(weighted * 100, 100.0)
+
+def _score_components(jd, resume_tokens, resume_matches, similarity):
+    jd_tokens = jd["tokens"]
+    common_tokens = jd_tokens.intersection(resume_tokens)
+    components = {
+        "keyword_overlap": len(common_tokens) / max(len(jd_tokens), 1),
+        "similarity": similarity,
+        "content_coverage": content_coverage(resume_matches),
+    }
+    total_score = float(combine_components(**components))
+    return total_score, verdict_for(total_score), missing_items(jd["matches"], resume_matches), components
+
+def unit_vector(vector):
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+def resume_features(resume_path, content_hash=None):
+    """JD-independent work for one resume: text, token set, taxonomy matches and normalized embedding."""
+    with metrics.timer("extract"):
+        resume_text = extract_text(resume_path, content_hash)
+    resume_tokens, resume_matches = lexical_analysis(resume_text)
+    # Single-resume paths go through the micro-batcher so concurrent requests share one encode call.
+    with metrics.timer("embed"):
+        resume_emb = chunking.embed_document(resume_text) if chunking.ENABLED else embedding_service.embed(resume_text)
+    return {"text": resume_text, "tokens": resume_tokens, "matches": resume_matches, "embedding": resume_emb}
+
+def analyze_resume(resume_path, jd, content_hash=None):
+    """Score one resume and also return its normalized embedding for the resume index."""
+    # `jd` is a precomputed artifact (see jd_artifacts.get_jd_artifact); a plain
+    # path is still accepted and built on the fly.
+    if isinstance(jd, str):
+        jd = build_jd_artifact(jd)
+
+    features = resume_features(resume_path, content_hash)
+    with metrics.timer("score"):
+        similarity = float(features["embedding"] @ unit_vector(jd["embedding"]))
+        score, verdict, missing, components = _score_components(jd, features["tokens"], features["matches"], similarity)
+    metrics.inc("documents_processed_total", kind="resume")
+    return {
+        "score": score, "verdict": verdict, "missing": missing, "components": components,
+        "embedding": features["embedding"], "text": features["text"],
+    }
+
+def score_resume(resume_path, jd):
+    result = analyze_resume(resume_path, jd)
+    return result["score"], result["verdict"], result["missing"]
+
+def analyze_batch(resume_paths, jd, batch_size=32, workers=8):
+    """Score many resumes against one JD artifact with batched tokenization and encoding."""
+    if isinstance(jd, str):
+        jd = build_jd_artifact(jd)
+    if not resume_paths:
+        return []
+
+    with metrics.timer("batch_extract"), ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = list(pool.map(extract_text, resume_paths))
+
+    with metrics.timer("batch_lexical"):
+        analyses = lexical_analysis_batch(texts)
+
+    with metrics.timer("batch_embed"):
+        resume_embs = embed_batch(texts, batch_size)
+
+    with metrics.timer("batch_score"):
+        results = score_analyzed(jd, analyses, resume_embs)
+    for result, text in zip(results, texts):
+        result["text"] = text
+    metrics.inc("documents_processed_total", len(results), kind="resume")
+    return results
+
+def embed_batch(texts, batch_size=32):
+    """Normalized float32 embeddings for many texts in batched encode calls."""
+    if chunking.ENABLED:
+        return np.stack(chunking.embed_documents(texts, batch_size=batch_size))
+    return get_embed_model().encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+def score_analyzed(jd, analyses, resume_embs):
+    """Score resumes already reduced to (tokens, matches) pairs and normalized embeddings against one JD artifact."""
+    similarities = resume_embs @ unit_vector(jd["embedding"])
+    results = []
+    for (tokens, matches), similarity, emb in zip(analyses, similarities, resume_embs):
+        score, verdict, missing, components = _score_components(jd, tokens, matches, float(similarity))
+        results.append({"score": score, "verdict": verdict, "missing": missing, "components": components, "embedding": emb})
+    return results
+
+def score_batch(resume_paths, jd, batch_size=32, workers=8):
+    return [
+        (result["score"], result["verdict"], result["missing"])
+        for result in analyze_batch(resume_paths, jd, batch_size=batch_size, workers=workers)
+    ]
@@ -0,0 +1,108 @@
+import argparse
+import sqlite3
+
+from database import init_db, get_conn, transaction
+from extraction import extract_text
+
+# Full-text candidate search over extracted resume text. A plain query is
+# split on whitespace and every word is quoted, so terms like c++, node.js or
+# -python are searched as text (all words must match; a trailing * keeps
+# prefix search). Advanced mode passes the query through as FTS5 syntax:
+# AND / OR / NOT, "exact phrases", prefix* and NEAR(a b, 5). Results are
+# ranked by BM25 and carry a highlighted snippet. Each hit is one
+# application (a resumes row), so the jd_file / verdict / score filters apply
+# per application. Pages are keyed on (bm25, id) rather than OFFSET.
+SNIPPET_TOKENS = 12
+
+
+def free_text_query(text):
+    """FTS5 query matching every whitespace-separated word of `text` literally; "" if there are none."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def search(conn, query, jd_file=None, verdict=None, min_score=None, max_score=None, after=None, limit=20, advanced=False):
+    """Return {"items": [...], "next": cursor or None}. Pass `next` back as `after` for the following page.
+
+    Raises ValueError for a query FTS5 rejects (only possible with advanced=True) or a bad cursor.
+    """
+    match = query if advanced else free_text_query(query)
+    if not match.strip():
+        return {"items": [], "next": None}
+    clauses = ["resume_fts MATCH ?"]
+    params = [match]
+    for clause, value in (
+        ("r.jd_file = ?", jd_file),
+        ("r.verdict = ?", verdict),
+        ("r.relevance_score >= ?", min_score),
+        ("r.relevance_score <= ?", max_score),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    if after is not None:
+        try:
+            rank, last_id = after.split(",")
+            params.extend([float(rank), float(rank), int(last_id)])
+        except ValueError:
+            raise ValueError(f"Invalid cursor {after!r}")
+        clauses.append("(bm25(resume_fts) > ? OR (bm25(resume_fts) = ? AND r.id > ?))")
+
+    sql = f"""
+        SELECT r.id, r.student_name, COALESCE(r.original_filename, r.file_path), r.jd_file, r.relevance_score,
+               r.verdict, r.created_at, snippet(resume_fts, 0, '<mark>', '</mark>', '…', {SNIPPET_TOKENS}), bm25(resume_fts)
+        FROM resume_fts
+        JOIN resume_texts t ON t.id = resume_fts.rowid
+        JOIN resumes r ON r.content_hash = t.content_hash
+        WHERE {' AND '.join(clauses)}
+        ORDER BY bm25(resume_fts), r.id
+        LIMIT ?
+    """
+    try:
+        rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+    except sqlite3.OperationalError as e:
+        raise ValueError(f"Invalid search query: {e}")
+
+    items = [
+        {"id": row[0], "student_name": row[1], "file_path": row[2], "jd_file": row[3], "relevance_score": row[4],
+         "verdict": row[5], "created_at": row[6], "snippet": row[7], "rank": row[8]}
+        for row in rows[:limit]
+    ]
+    next_cursor = f"{items[-1]['rank']!r},{items[-1]['id']}" if len(rows) > limit else None
+    return {"items": items, "next": next_cursor}
+
+
+def backfill(conn):
+    """Extract and index text for stored resumes that predate the search index; returns the number added."""
+    rows = conn.execute("""
+        SELECT content_hash, MIN(file_path) FROM resumes
+        WHERE content_hash IS NOT NULL AND content_hash NOT IN (SELECT content_hash FROM resume_texts)
+        GROUP BY content_hash
+    """).fetchall()
+    added = 0
+    for content_hash, file_path in rows:
+        text = extract_text(file_path, content_hash)
+        if text.startswith("[ERROR]"):
+            continue
+        with transaction(conn):
+            conn.execute("INSERT OR IGNORE INTO resume_texts(content_hash, text) VALUES(?, ?)", (content_hash, text))
+        added += 1
+    return added
+
+
+def main():
+    argparse.ArgumentParser(description="Index the text of stored resumes that are missing from full-text search.").parse_args()
+    init_db()
+    conn = get_conn()
+    added = backfill(conn)
+    conn.close()
+    print(f"Indexed {added} resumes")
+
+
+if __name__ == "__main__":
+    main()
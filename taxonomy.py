@@ -0,0 +1,150 @@
+import argparse
+import csv
+import json
+import os
+import threading
+
+from models import get_nlp
+
+# Skills, certifications and projects live in a versioned JSON file rather than
+# in code. Each canonical term lists its synonyms, and every phrase is compiled
+# once into a spaCy PhraseMatcher. Matching is a single hash-based pass over the
+# document's tokens, so its cost depends on document length, not on how many
+# terms the taxonomy holds.
+#
+# data/taxonomy.json is a seed set (a few hundred skills, a few dozen
+# certifications and projects) covering the postings in data/jds. Grow it by
+# merging term lists, e.g. an export of ESCO or O*NET skills:
+#   python taxonomy.py merge skills.csv --category skills --version 2026.11.0
+# Each CSV row is a canonical term followed by its synonyms. The version must
+# change with the content, since it is part of the scoring version.
+TAXONOMY_PATH = os.environ.get("TAXONOMY_PATH", "data/taxonomy.json")
+CATEGORIES = ("skills", "certifications", "projects")
+
+_compiled = None
+_version = None
+_lock = threading.Lock()
+
+
+def _read():
+    with open(TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _compile():
+    from spacy.matcher import PhraseMatcher
+
+    data = _read()
+    nlp = get_nlp()
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    canonical = {}
+    bonus_targets = {}
+    for category in CATEGORIES:
+        spec = data["categories"].get(category, {"terms": {}})
+        terms = spec["terms"]
+        bonus_targets[category] = spec.get("bonus_target", len(terms))
+        for term, synonyms in terms.items():
+            key = f"{category}:{term}"
+            canonical[nlp.vocab.strings.add(key)] = (category, term)
+            matcher.add(key, list(nlp.tokenizer.pipe([term, *synonyms])))
+
+    return {
+        "version": str(data.get("version", "0")),
+        "matcher": matcher,
+        "canonical": canonical,
+        "bonus_targets": bonus_targets,
+    }
+
+
+def get():
+    global _compiled
+    if _compiled is None:
+        with _lock:
+            if _compiled is None:
+                _compiled = _compile()
+    return _compiled
+
+
+def version():
+    # Read from the file directly so callers that only need the version (e.g.
+    # dedup lookups) don't load spaCy to compile the matcher.
+    global _version
+    if _version is None:
+        _version = str(_read().get("version", "0"))
+    return _version
+
+
+def bonus_targets():
+    return get()["bonus_targets"]
+
+
+def match(doc):
+    """Return {category: set(canonical terms)} for every taxonomy phrase found in `doc`."""
+    compiled = get()
+    found = {category: set() for category in CATEGORIES}
+    for match_id, _, _ in compiled["matcher"](doc):
+        category, term = compiled["canonical"][match_id]
+        found[category].add(term)
+    return found
+
+
+def merge(path, category, new_version):
+    """Add the terms in CSV `path` (term, synonyms...) to `category`; returns the number of new terms."""
+    data = _read()
+    terms = data["categories"].setdefault(category, {"terms": {}})["terms"]
+    added = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            phrases = [phrase.strip().lower() for phrase in row if phrase.strip()]
+            if not phrases or phrases[0].startswith("#"):
+                continue
+            term, synonyms = phrases[0], phrases[1:]
+            if term not in terms:
+                terms[term] = []
+                added += 1
+            terms[term].extend(synonym for synonym in synonyms if synonym not in terms[term] and synonym != term)
+    data["version"] = new_version
+    tmp_path = f"{TAXONOMY_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(_dumps(data))
+    os.replace(tmp_path, TAXONOMY_PATH)
+    return added
+
+
+def _dumps(data):
+    # Same layout as the checked-in file, one term per line, so merges diff cleanly.
+    def dump(value):
+        return json.dumps(value, ensure_ascii=False)
+
+    lines = ["{"]
+    lines += [f"  {dump(key)}: {dump(value)}," for key, value in data.items() if key != "categories"]
+    lines.append('  "categories": {')
+    categories = list(data["categories"].items())
+    for i, (category, spec) in enumerate(categories):
+        lines.append(f"    {dump(category)}: {{")
+        lines += [f"      {dump(key)}: {dump(value)}," for key, value in spec.items() if key != "terms"]
+        lines.append('      "terms": {')
+        terms = list(spec["terms"].items())
+        lines += [f"        {dump(term)}: {dump(synonyms)}{',' if j < len(terms) - 1 else ''}" for j, (term, synonyms) in enumerate(terms)]
+        lines.append("      }")
+        lines.append("    }" + ("," if i < len(categories) - 1 else ""))
+    lines += ["  }", "}"]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the skills/certifications/projects taxonomy.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge_parser = commands.add_parser("merge", help="Add terms from a CSV of term, synonym, synonym, ...")
+    merge_parser.add_argument("csv_file")
+    merge_parser.add_argument("--category", choices=CATEGORIES, required=True)
+    merge_parser.add_argument("--version", required=True, help="New taxonomy version; must differ from the current one")
+    args = parser.parse_args()
+    if args.version == version():
+        parser.error(f"taxonomy is already at version {args.version}; pass a new one")
+    added = merge(args.csv_file, args.category, args.version)
+    print(f"Added {added} {args.category} to {TAXONOMY_PATH} (version {args.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The modules keep their state (database, caches, index) under paths relative
+# to the working directory, so the tests run from a scratch directory with the
+# offline models; see fake_models.py.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("FAKE_MODELS", "1")
+os.environ.setdefault("FAKE_EMBED_DIM", "16")
+os.environ.setdefault("TAXONOMY_PATH", str(ROOT / "data" / "taxonomy.json"))
+os.chdir(tempfile.mkdtemp(prefix="resume-tests-"))
+(Path("data") / "jds").mkdir(parents=True)
+(Path("data") / "resumes").mkdir(parents=True)
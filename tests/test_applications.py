@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+import embedding_index
+from database import get_conn
+
+RESUME = b"Analyst with python, sql and tableau dashboards for finance reporting"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app.app) as client:
+        response = client.post("/upload_jd", data={"role": "Analyst"}, files={"file": ("apps_jd.txt", b"python sql tableau")})
+        assert response.status_code == 200
+        yield client
+
+
+def _rows(body):
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT r.id, r.student_name, r.relevance_score FROM resumes r JOIN resume_texts t ON t.content_hash = r.content_hash "
+        "WHERE r.jd_file = 'apps_jd.txt' AND t.text LIKE ? ORDER BY r.id",
+        (f"%{body}%",),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def _upload(client, student, body, **data):
+    return client.post(
+        "/upload_resume", data={"student_name": student, "jd_file": "apps_jd.txt", **data},
+        files={"file": (f"{student}.txt", RESUME + body.encode())},
+    ).json()
+
+
+def test_same_file_from_another_student_is_recorded(client):
+    first = _upload(client, "ana", "single")
+    second = _upload(client, "ben", "single")
+    assert not first.get("duplicate") and second["duplicate"]
+    assert second["score"] == first["score"]
+
+    rows = _rows("single")
+    assert [row[1] for row in rows] == ["ana", "ben"]
+    assert rows[0][2] == rows[1][2]
+    vectors = embedding_index.vectors_for([row[0] for row in rows])
+    assert (vectors[rows[0][0]] == vectors[rows[1][0]]).all()
+
+    assert _upload(client, "ben", "single")["duplicate"]
+    assert [row[1] for row in _rows("single")] == ["ana", "ben"]
+
+
+def test_queued_duplicate_is_recorded(client):
+    _upload(client, "cara", "queued")
+    assert _upload(client, "dev", "queued", queued="true")["result"]["duplicate"]
+    assert [row[1] for row in _rows("queued")] == ["cara", "dev"]
+
+
+def test_batch_records_every_student(client):
+    content = RESUME + b" batch"
+    files = [("files", ("eve.txt", content)), ("files", ("finn.txt", content)), ("files", ("eve.txt", content))]
+    response = client.post("/score_batch", data={"jd_file": "apps_jd.txt"}, files=files)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["duplicate"] for result in results] == [False, True, True]
+    assert [row[1] for row in _rows("batch")] == ["eve", "finn"]
+
+    response = client.post("/score_batch", data={"jd_file": "apps_jd.txt"}, files=[("files", ("gus.txt", content))])
+    assert response.json()["results"][0]["duplicate"]
+    assert [row[1] for row in _rows("batch")] == ["eve", "finn", "gus"]
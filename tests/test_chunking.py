@@ -0,0 +1,50 @@
+import pytest
+
+import chunking
+from database import init_db, get_conn, transaction
+from models import embed_model_id
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    init_db()
+    with transaction() as conn:
+        conn.execute("DELETE FROM chunk_embeddings")
+    monkeypatch.setattr(chunking, "STRATEGY", "window")
+    monkeypatch.setattr(chunking, "MAX_WORDS", 3)
+    monkeypatch.setattr(chunking, "OVERLAP_WORDS", 0)
+    monkeypatch.setattr(chunking, "_cache_rows", None)
+
+
+def _rows():
+    conn = get_conn()
+    rows = conn.execute("SELECT model, COUNT(*) FROM chunk_embeddings GROUP BY model").fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def _document(n, words=3):
+    return " ".join(f"doc{n}word{i}" for i in range(words))
+
+
+def test_cache_is_capped(cache, monkeypatch):
+    monkeypatch.setattr(chunking, "CACHE_MAX_ROWS", 10)
+    for n in range(12):
+        chunking.embed_documents([_document(n)], batch_size=4)
+    assert 9 <= _rows()[embed_model_id()] <= 10
+
+    # Evicted chunks are encoded again rather than lost.
+    assert chunking.embed_documents([_document(0)], batch_size=4)[0].shape == (16,)
+
+
+def test_other_models_are_dropped(cache):
+    with transaction() as conn:
+        conn.execute("INSERT INTO chunk_embeddings(chunk_hash, model, embedding) VALUES('old', 'retired-model', x'00')")
+    chunking.embed_documents([_document(0, words=6)], batch_size=4)
+    assert _rows() == {embed_model_id(): 2}
+
+
+def test_cache_can_be_turned_off(cache, monkeypatch):
+    monkeypatch.setattr(chunking, "CACHE_MAX_ROWS", 0)
+    chunking.embed_documents([_document(0)], batch_size=4)
+    assert _rows() == {}
@@ -0,0 +1,46 @@
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+import embedding_service
+
+
+@pytest.fixture
+def stalled_encoder(monkeypatch):
+    release = threading.Event()
+
+    def encode(texts):
+        release.wait(5)
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+    monkeypatch.setattr(embedding_service, "ENABLED", True)
+    monkeypatch.setattr(embedding_service, "_encode", encode)
+    yield
+    release.set()
+
+
+def test_embed_times_out(stalled_encoder):
+    timed_out = embedding_service.stats()["timed_out"]
+    with pytest.raises(TimeoutError):
+        embedding_service.embed("stuck", timeout=0.05)
+    with pytest.raises(TimeoutError):
+        embedding_service.embed_many(["one", "two"], timeout=0.05)
+    assert embedding_service.stats()["timed_out"] > timed_out
+
+
+def test_embed_timeout_is_503(monkeypatch):
+    def embed(text):
+        raise TimeoutError("Embedding not ready within 0s")
+
+    monkeypatch.setattr(embedding_service, "embed", embed)
+    with TestClient(app.app) as client:
+        client.post("/upload_jd", data={"role": "Timeout"}, files={"file": ("timeout_jd.txt", b"go rust")})
+        response = client.post(
+            "/upload_resume", data={"student_name": "slow", "jd_file": "timeout_jd.txt"},
+            files={"file": ("slow.txt", b"Go and rust systems programmer, unique timeout resume")},
+        )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
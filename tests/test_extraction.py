@@ -0,0 +1,38 @@
+import os
+
+import extraction
+
+
+def test_store_uses_a_unique_temp_file_per_write(monkeypatch, tmp_path):
+    monkeypatch.setattr(extraction, "TEXT_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(extraction, "_cache_bytes", 0)
+    sources = []
+    real_replace = os.replace
+    monkeypatch.setattr(extraction.os, "replace", lambda src, dst: sources.append(str(src)) or real_replace(src, dst))
+    extraction._store("ab" * 32, "first")
+    extraction._store("ab" * 32, "second")
+    assert len(set(sources)) == 2
+    assert extraction._cache_path("ab" * 32).read_text() == "second"
+
+
+def test_eviction_skips_entries_removed_by_another_process(monkeypatch, tmp_path):
+    (tmp_path / "aa").mkdir()
+    files = []
+    for i in range(4):
+        path = tmp_path / "aa" / f"{i}.txt"
+        path.write_text("x" * 100)
+        os.utime(path, (i, i))
+        files.append(path)
+    ghost = tmp_path / "aa" / "gone.txt"
+
+    class Listing:
+        def glob(self, pattern):
+            return [ghost, *files]
+
+    monkeypatch.setattr(extraction, "TEXT_CACHE_DIR", Listing())
+    monkeypatch.setattr(extraction, "TEXT_CACHE_MAX_BYTES", 250)
+    monkeypatch.setattr(extraction, "_cache_bytes", None)
+    assert extraction._current_cache_bytes() == 400
+    extraction._evict()
+    assert [path.exists() for path in files] == [False, False, True, True]
+    assert extraction._current_cache_bytes() == 200
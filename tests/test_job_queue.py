@@ -0,0 +1,83 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+import job_queue
+from database import init_db, get_conn, transaction
+
+
+@pytest.fixture
+def queue_only():
+    # Nothing else may be claimable: jobs left by other tests are closed out.
+    init_db()
+    with transaction() as conn:
+        conn.execute("UPDATE jobs_queue SET status = 'done' WHERE status IN ('pending', 'running')")
+
+
+def _expire(job_id):
+    with transaction() as conn:
+        conn.execute("UPDATE jobs_queue SET claimed_at = datetime('now', ?) WHERE id = ?",
+                      (f"-{job_queue.LEASE_SECONDS + 1} seconds", job_id))
+
+
+def _claimed_at(job_id):
+    conn = get_conn()
+    claimed_at = conn.execute("SELECT claimed_at FROM jobs_queue WHERE id = ?", (job_id,)).fetchone()[0]
+    conn.close()
+    return claimed_at
+
+
+def test_running_job_is_not_claimed_while_leased(queue_only):
+    job_id = job_queue.enqueue("lease", "lease.txt", "jd.txt")
+    assert job_queue._claim_next()[0] == job_id
+    assert job_queue.get_job(job_id)["status"] == "running"
+    assert job_queue._claim_next() is None
+
+
+def test_expired_lease_is_reclaimed(queue_only):
+    job_id = job_queue.enqueue("expired", "expired.txt", "jd.txt")
+    job_queue._claim_next()
+    _expire(job_id)
+    expired_at = _claimed_at(job_id)
+    reclaimed = job_queue._claim_next()
+    assert reclaimed[0] == job_id
+    assert reclaimed[-1] == _claimed_at(job_id) > expired_at
+    assert job_queue._claim_next() is None
+
+
+def test_finish_is_rejected_after_reclaim(queue_only):
+    job_id = job_queue.enqueue("stale", "stale.txt", "jd.txt")
+    stale = job_queue._claim_next()
+    _expire(job_id)
+    stale_claimed_at = _claimed_at(job_id)
+    current = job_queue._claim_next()
+    assert current[-1] != stale_claimed_at
+
+    job_queue._finish(job_id, stale_claimed_at, "failed", error="worker hung")
+    assert job_queue.get_job(job_id)["status"] == "running"
+
+    job_queue._finish(job_id, current[-1], "done", result={"score": 1.0})
+    job = job_queue.get_job(job_id)
+    assert (job["status"], job["result"], job["error"]) == ("done", {"score": 1.0}, None)
+
+    job_queue._finish(job_id, current[-1], "failed", error="late")
+    assert job_queue.get_job(job_id)["status"] == "done"
+
+
+def test_worker_scores_queued_upload(queue_only, monkeypatch):
+    monkeypatch.setattr(job_queue, "POLL_INTERVAL", 0.05)
+    with TestClient(app.app) as client:
+        client.post("/upload_jd", data={"role": "Ops"}, files={"file": ("queue_jd.txt", b"linux bash kubernetes")})
+        response = client.post(
+            "/upload_resume", data={"student_name": "queued", "jd_file": "queue_jd.txt", "queued": "true"},
+            files={"file": ("queued.txt", b"Site reliability engineer: linux, bash and kubernetes on call")},
+        )
+        job_id = response.json()["job_id"]
+        deadline = time.monotonic() + 10
+        while job_queue.get_job(job_id)["status"] in ("pending", "running") and time.monotonic() < deadline:
+            time.sleep(0.05)
+        job = job_queue.get_job(job_id)
+    assert job["status"] == "done"
+    assert "score" in job["result"]
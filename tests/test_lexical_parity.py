@@ -0,0 +1,120 @@
+"""Tokenizer-only scoring must match a full spaCy pipeline on the sample data.
+
+Scoring runs only the tokenizer (models.py excludes the statistical
+components) on the grounds that token text, is_alpha and the stop-word list
+all come from it. These tests run the scoring functions with the pipeline
+scoring loads and compare them with nlp(text) from the full pipeline, over
+every resume x JD pair in data/:
+
+- blank: spacy.blank("en"), what FAKE_MODELS loads, against the same language
+  with components added. Always runs.
+- full: en_core_web_sm loaded as models.py loads it, against the complete
+  model. Skipped when the model is not installed.
+"""
+import numpy as np
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+import models  # noqa: E402
+import scoring  # noqa: E402
+import taxonomy  # noqa: E402
+from conftest import ROOT  # noqa: E402
+from extraction import extract_text  # noqa: E402
+
+EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def _documents(directory):
+    return sorted(path for path in (ROOT / "data" / directory).iterdir() if path.suffix.lower() in EXTENSIONS)
+
+
+RESUMES = _documents("resumes")
+JDS = _documents("jds")
+
+
+def _blank():
+    full = spacy.blank("en")
+    full.add_pipe("sentencizer")
+    full.add_pipe("attribute_ruler")
+    return spacy.blank("en"), full
+
+
+def _model():
+    try:
+        return spacy.load(models.SPACY_MODEL, exclude=models.SPACY_LEXICAL_EXCLUDE), spacy.load(models.SPACY_MODEL)
+    except OSError:
+        pytest.skip(f"spaCy model {models.SPACY_MODEL} is not installed")
+
+
+@pytest.fixture(scope="module", params=["blank", "full"])
+def pipelines(request):
+    """(pipeline scoring uses, full pipeline), with scoring and the taxonomy matcher switched to the former."""
+    lexical, full = _blank() if request.param == "blank" else _model()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(scoring, "get_nlp", lambda: lexical)
+        patch.setattr(taxonomy, "get_nlp", lambda: lexical)
+        patch.setattr(taxonomy, "_compiled", None)
+        yield lexical, full
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return {path: extract_text(str(path)) for path in RESUMES + JDS}
+
+
+@pytest.fixture(scope="module")
+def reference(pipelines, texts):
+    """Token set and taxonomy matches per document from nlp(text) on the full pipeline."""
+    from spacy.lang.en.stop_words import STOP_WORDS
+
+    _, full = pipelines
+    analyses = {}
+    for path, text in texts.items():
+        doc = full(text.lower())
+        tokens = {token.text for token in doc if token.is_alpha and token.text not in STOP_WORDS}
+        analyses[path] = (tokens, taxonomy.match(doc))
+    return analyses
+
+
+def test_sample_data_present():
+    assert RESUMES and JDS
+
+
+def test_blank_reference_runs_components():
+    _, full = _blank()
+    assert full.pipe_names and full("One. Two.").has_annotation("SENT_START")
+
+
+@pytest.mark.parametrize("path", RESUMES + JDS, ids=lambda path: path.name)
+def test_lexical_analysis_matches_full_pipeline(path, texts, reference):
+    assert scoring.lexical_tokens(texts[path]) == reference[path][0]
+    assert scoring.lexical_analysis(texts[path]) == reference[path]
+
+
+def test_lexical_analysis_batch_matches_full_pipeline(texts, reference):
+    paths = list(texts)
+    batch = scoring.lexical_analysis_batch([texts[path] for path in paths])
+    for path, analysis in zip(paths, batch):
+        assert analysis == reference[path], path.name
+
+
+@pytest.mark.parametrize("jd", JDS, ids=lambda path: path.name)
+def test_scores_match_full_pipeline(jd, texts, reference):
+    rng = np.random.default_rng(0)
+    embedding = rng.standard_normal(8).astype("float32")
+    embeddings = rng.standard_normal((len(RESUMES), 8)).astype("float32")
+
+    tokens, matches = scoring.lexical_analysis(texts[jd])
+    analyses = scoring.lexical_analysis_batch([texts[resume] for resume in RESUMES])
+    scored = scoring.score_analyzed({"tokens": tokens, "matches": matches, "embedding": embedding}, analyses, embeddings)
+
+    jd_tokens, jd_matches = reference[jd]
+    expected = scoring.score_analyzed({"tokens": jd_tokens, "matches": jd_matches, "embedding": embedding},
+                                      [reference[resume] for resume in RESUMES], embeddings)
+    for resume, result, want in zip(RESUMES, scored, expected):
+        assert (result["score"], result["verdict"], result["components"]) == \
+            (want["score"], want["verdict"], want["components"]), resume.name
+        # missing_items shuffles the skills it lists.
+        assert {key: sorted(items) for key, items in result["missing"].items()} == \
+            {key: sorted(items) for key, items in want["missing"].items()}, resume.name
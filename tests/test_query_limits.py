@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app.app) as client:
+        response = client.post("/upload_jd", data={"role": "Limits"}, files={"file": ("limits_jd.txt", b"go rust")})
+        assert response.status_code == 200
+        yield client
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/admin/summary", {"k": -1}),
+    ("/admin/summary", {"k": 0}),
+    ("/admin/summary", {"k": app.MAX_PAGE_SIZE + 1}),
+    ("/admin/applications", {"limit": -1}),
+    ("/jds", {"limit": -1}),
+    ("/search", {"q": "go", "limit": -1}),
+    ("/rank", {"jd_file": "limits_jd.txt", "k": -1}),
+    ("/rank", {"jd_file": "limits_jd.txt", "k": app.MAX_PAGE_SIZE + 1}),
+])
+def test_out_of_range_sizes_are_rejected(client, path, params):
+    assert client.get(path, params=params).status_code == 422
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/admin/summary", {"k": app.MAX_PAGE_SIZE}),
+    ("/admin/applications", {"limit": 1}),
+    ("/jds", {"limit": app.MAX_PAGE_SIZE}),
+    ("/search", {"q": "go", "limit": 1}),
+    ("/rank", {"jd_file": "limits_jd.txt", "k": 1}),
+])
+def test_sizes_in_range_are_accepted(client, path, params):
+    assert client.get(path, params=params).status_code == 200
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+import jd_artifacts
+import recommend
+import revisions
+import scoring
+from database import init_db, get_conn
+from jd_artifacts import get_jd_artifact
+
+JDS = {
+    "rec_data.txt": "Data scientist: python, sql, pandas, machine learning and statistics",
+    "rec_backend.txt": "Backend engineer: java, docker, kubernetes, aws and microservices",
+    "rec_web.txt": "Frontend developer: react, typescript, html and css",
+}
+
+
+def _post(jd_file, text, role="Role"):
+    path = Path("data/jds") / jd_file
+    path.write_text(text)
+    artifact = get_jd_artifact(str(path))
+    conn = get_conn()
+    revisions.record_revision(conn, role, jd_file, artifact["hash"])
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def resume():
+    init_db()
+    for jd_file, text in JDS.items():
+        _post(jd_file, text)
+    path = Path("data/resumes/rec_resume.txt")
+    path.write_text("Python and SQL analyst, pandas, statistics, some docker")
+    return str(path)
+
+
+def _by_file(results):
+    return {result["jd_file"]: result for result in results if result["jd_file"] in JDS}
+
+
+def test_scores_match_single_posting_scoring(resume):
+    results = _by_file(recommend.recommend(resume, limit=50))
+    assert set(results) == set(JDS)
+    for jd_file, result in results.items():
+        expected = scoring.analyze_resume(resume, get_jd_artifact(f"data/jds/{jd_file}"))
+        assert result["score"] == pytest.approx(expected["score"], abs=1e-4)
+        assert result["verdict"] == expected["verdict"]
+    assert max(results.values(), key=lambda result: result["score"])["jd_file"] == "rec_data.txt"
+
+
+def test_rebuild_reuses_unchanged_postings_and_swaps_whole_index(resume, monkeypatch):
+    before = recommend._get_index()
+    built = []
+    real = recommend.get_jd_artifact
+    monkeypatch.setattr(recommend, "get_jd_artifact", lambda path, jd_hash=None: built.append(path) or real(path, jd_hash))
+
+    _post("rec_web.txt", "Frontend developer: react, vue, css and accessibility")
+    after = recommend._get_index()
+    assert built == ["data/jds/rec_web.txt"]
+    assert after is not before
+    # The old snapshot is untouched, so a caller still holding it stays consistent.
+    assert before["embeddings"].shape[0] == len(before["jobs"]) == len(before["matches"])
+    assert before["keywords"].shape[0] == len(before["jobs"])
+
+
+def test_posting_with_missing_file_is_skipped(resume):
+    _post("rec_gone.txt", "Site reliability engineer: linux, terraform, prometheus")
+    jd_hash = get_jd_artifact("data/jds/rec_gone.txt")["hash"]
+    Path("data/jds/rec_gone.txt").unlink()
+    # Drop every cached copy so the posting has to be rebuilt from the (missing) file.
+    jd_artifacts._artifact_path(jd_hash).unlink()
+    jd_artifacts._lru.clear()
+    recommend._index = {"key": None, "jobs": [], "features": {}}
+    results = _by_file(recommend.recommend(resume, limit=50))
+    assert "rec_gone.txt" not in results
+    assert set(results) == set(JDS)
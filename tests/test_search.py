@@ -0,0 +1,68 @@
+import pytest
+
+import search
+from database import init_db, get_conn, insert_resumes
+
+TEXTS = {
+    "a": "Backend developer: C++ and node.js services, data-science tooling, python scripts",
+    "b": "Frontend engineer with react and typescript",
+}
+
+
+@pytest.fixture(scope="module")
+def conn():
+    init_db()
+    conn = get_conn()
+    insert_resumes(conn, [
+        {"student_name": name, "file_path": f"{name}.txt", "jd_file": "search.txt", "relevance_score": 50.0,
+         "verdict": "Strong Match", "content_hash": f"search-{name}", "text": text}
+        for name, text in TEXTS.items()
+    ])
+    yield conn
+    conn.close()
+
+
+def _names(result):
+    return sorted(item["student_name"] for item in result["items"] if item["jd_file"] == "search.txt")
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("c++", ["a"]),
+    ("node.js", ["a"]),
+    ("data-science", ["a"]),
+    ("-python", ["a"]),
+    ("pyth*", ["a"]),
+    ("react typescript", ["b"]),
+    ("react python", []),
+    ('"unterminated', []),
+])
+def test_free_text_queries_are_literal(conn, query, expected):
+    assert _names(search.search(conn, query, jd_file="search.txt")) == expected
+
+
+@pytest.mark.parametrize("query", ["*", "   ", '""'])
+def test_queries_without_terms_return_nothing(conn, query):
+    assert search.search(conn, query) == {"items": [], "next": None}
+
+
+def test_advanced_mode_takes_fts5_syntax(conn):
+    assert _names(search.search(conn, "react OR python", advanced=True)) == ["a", "b"]
+    assert _names(search.search(conn, "engineer NOT python", advanced=True)) == ["b"]
+
+
+@pytest.mark.parametrize("query", ['"unterminated', "*", "c++", "AND", "NEAR(", "nosuchcolumn:python"])
+def test_advanced_mode_rejects_bad_syntax_with_value_error(conn, query):
+    with pytest.raises(ValueError, match="Invalid search query"):
+        search.search(conn, query, advanced=True)
+
+
+def test_search_endpoint_maps_bad_queries_to_400(conn):
+    from fastapi.testclient import TestClient
+
+    import app
+
+    client = TestClient(app.app)
+    for query in ('"unterminated', "*", "c++", "node.js", "data-science", "-python"):
+        assert client.get("/search", params={"q": query}).status_code == 200, query
+    assert client.get("/search", params={"q": '"unterminated', "advanced": "true"}).status_code == 400
+    assert client.get("/search", params={"q": "*", "advanced": "true"}).status_code == 400
@@ -0,0 +1,94 @@
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+import uploads
+
+RESUME = b"Python and SQL developer with pandas, docker and machine learning experience"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app.app) as client:
+        response = client.post("/upload_jd", data={"role": "Data"}, files={"file": ("uploads_jd.txt", b"python sql pandas")})
+        assert response.status_code == 200
+        yield client
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _score_batch(client, *files):
+    return client.post("/score_batch", data={"jd_file": "uploads_jd.txt"}, files=[("files", file) for file in files])
+
+
+def _leftovers():
+    return [name for name in os.listdir("data/resumes") if name.startswith(".upload-")]
+
+
+def test_batch_with_plain_files_and_zip(client):
+    archive = _zip({"a/one.txt": RESUME + b" one", "two.txt": RESUME + b" two", "notes.md": b"skipped"})
+    response = _score_batch(client, ("solo.txt", RESUME), ("batch.zip", archive))
+    assert response.status_code == 200
+    assert [result["student_name"] for result in response.json()["results"]] == ["solo", "one", "two"]
+
+
+def test_body_over_limit_is_refused(client):
+    body = b"x" * (uploads.MAX_UPLOAD_BYTES + uploads.FORM_OVERHEAD_BYTES + 1)
+    assert _score_batch(client, ("big.txt", body)).status_code == 413
+
+
+def test_zip_member_over_limit_is_refused(client, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 100_000)
+    response = _score_batch(client, ("bomb.zip", _zip({"bomb.txt": b"0" * 1_000_000})))
+    assert response.status_code == 413
+    assert "bomb.txt" in response.json()["detail"]
+    assert _leftovers() == []
+
+
+def test_zip_total_over_limit_is_refused(client, monkeypatch):
+    monkeypatch.setattr(uploads, "ZIP_MAX_TOTAL_BYTES", 150_000)
+    members = {f"r{i}.txt": bytes([65 + i]) * 60_000 for i in range(3)}
+    response = _score_batch(client, ("many.zip", _zip(members)))
+    assert response.status_code == 413
+    assert "uncompressed" in response.json()["detail"]
+    assert _leftovers() == []
+
+
+def test_zip_member_count_is_capped(client, monkeypatch):
+    monkeypatch.setattr(uploads, "ZIP_MAX_MEMBERS", 2)
+    members = {f"r{i}.txt": RESUME + str(i).encode() for i in range(3)}
+    assert _score_batch(client, ("count.zip", _zip(members))).status_code == 413
+
+
+def test_invalid_zip_is_a_bad_request(client):
+    assert _score_batch(client, ("broken.zip", b"not a zip")).status_code == 400
+    assert _leftovers() == []
+
+
+def test_cpu_queue_depth_counts_tasks_waiting_for_a_worker():
+    import asyncio
+    import threading
+
+    release = threading.Event()
+    workers = uploads.CPU_WORKERS
+
+    async def run():
+        tasks = [asyncio.ensure_future(uploads.run_cpu(release.wait, 10)) for _ in range(workers + 2)]
+        await asyncio.sleep(0.2)
+        waiting = uploads.cpu_queue_depth()
+        release.set()
+        await asyncio.gather(*tasks)
+        return waiting
+
+    assert asyncio.run(run()) == 2
+    assert uploads.cpu_queue_depth() == 0
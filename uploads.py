@@ -0,0 +1,227 @@
+import asyncio
+import contextvars
+import hashlib
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from anyio import to_thread
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+import metrics
+from extraction import CHUNK_SIZE, MAX_FILE_BYTES, place_upload, save_upload as save_file, upload_tmp_path
+
+# Upload handling for the async endpoints. Request bodies are capped before
+# they are parsed: a declared Content-Length over the limit is refused without
+# reading a byte, and chunked bodies are cut off as soon as they pass it. The
+# file part is then streamed to disk in CHUNK_SIZE pieces and hashed on the
+# way, with file writes on the I/O threadpool (UPLOAD_IO_THREADS threads).
+# Extraction and inference run on a separate executor of SCORING_CPU_WORKERS
+# threads, so slow clients only ever hold I/O threads and never the capacity
+# that scores resumes. Zip uploads are expanded with every member capped at
+# MAX_UPLOAD_BYTES and the archive at ZIP_MAX_TOTAL_BYTES uncompressed and
+# ZIP_MAX_MEMBERS files, counted as the bytes come out rather than trusted
+# from the archive's headers.
+MAX_UPLOAD_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(MAX_FILE_BYTES)))
+ZIP_MAX_TOTAL_BYTES = int(os.environ.get("UPLOAD_ZIP_MAX_TOTAL_BYTES", str(10 * MAX_UPLOAD_BYTES)))
+ZIP_MAX_MEMBERS = int(os.environ.get("UPLOAD_ZIP_MAX_MEMBERS", "1000"))
+FORM_OVERHEAD_BYTES = 64 * 1024  # multipart boundaries and the small form fields
+IO_THREADS = int(os.environ.get("UPLOAD_IO_THREADS", "40"))
+CPU_WORKERS = int(os.environ.get("SCORING_CPU_WORKERS", str(os.cpu_count() or 1)))
+
+_lock = threading.Lock()
+_executor = None
+_waiting = 0  # run_cpu calls submitted but not yet started
+
+
+def _too_large(detail=None):
+    metrics.inc("uploads_rejected_total", reason="too_large")
+    return HTTPException(status_code=413, detail=detail or f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+
+
+class BodySizeLimit:
+    """ASGI middleware refusing request bodies over MAX_UPLOAD_BYTES on the given paths."""
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.limit = MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.limit:
+            error = _too_large()
+            return await JSONResponse({"detail": error.detail}, status_code=error.status_code)(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    raise _too_large()  # FastAPI re-raises HTTPExceptions from body parsing as-is
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def configure_io_threads():
+    """Size the threadpool that runs sync endpoints and upload writes; call from the event loop."""
+    to_thread.current_default_thread_limiter().total_tokens = IO_THREADS
+
+
+async def save_upload(upload, dest_path):
+    """Stream an UploadFile to dest_path, hashing as it goes. Returns (sha256, size); 413 past MAX_UPLOAD_BYTES."""
+    digest = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(open, dest_path, "wb")
+    try:
+        while chunk := await upload.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise _too_large()
+            digest.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        await run_in_threadpool(f.close)
+        os.remove(dest_path)
+        raise
+    await run_in_threadpool(f.close)
+    return digest.hexdigest(), size
+
+
+async def store_upload(upload, directory, filename):
+    """Async counterpart of extraction.store_upload: saves as <directory>/<sha256><ext>, returns (path, sha256)."""
+    tmp_path = upload_tmp_path(directory)
+    content_hash, _ = await save_upload(upload, tmp_path)
+    return place_upload(tmp_path, directory, filename, content_hash), content_hash
+
+
+async def replace_upload(upload, dest_path):
+    """Stream an upload into place at dest_path, swapping it in only once complete. Returns (sha256, size)."""
+    tmp_path = upload_tmp_path(os.path.dirname(dest_path))
+    result = await save_upload(upload, tmp_path)
+    os.replace(tmp_path, dest_path)
+    return result
+
+
+class _CappedReader:
+    """File-object wrapper that raises 413 once more than `limit` bytes have been read."""
+
+    def __init__(self, src, limit, detail):
+        self.src = src
+        self.limit = limit
+        self.detail = detail
+        self.size = 0
+
+    def read(self, n=-1):
+        data = self.src.read(n)
+        self.size += len(data)
+        if self.size > self.limit:
+            raise _too_large(self.detail)
+        return data
+
+
+def _expand_zip(zip_path, directory, extensions):
+    saved = []
+    total = 0
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [
+            member for member in archive.infolist()
+            if not member.is_dir() and os.path.basename(member.filename).lower().endswith(extensions)
+        ]
+        if len(members) > ZIP_MAX_MEMBERS:
+            raise _too_large(f"Zip archive holds more than {ZIP_MAX_MEMBERS} resumes")
+        for member in members:
+            name = os.path.basename(member.filename)
+            remaining = ZIP_MAX_TOTAL_BYTES - total
+            if MAX_UPLOAD_BYTES < remaining:
+                limit, detail = MAX_UPLOAD_BYTES, f"{name} exceeds {MAX_UPLOAD_BYTES} bytes uncompressed"
+            else:
+                limit, detail = remaining, f"Zip archive exceeds {ZIP_MAX_TOTAL_BYTES} bytes uncompressed"
+            tmp_path = upload_tmp_path(directory)
+            try:
+                with archive.open(member) as src:
+                    content_hash, size = save_file(_CappedReader(src, limit, detail), tmp_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            total += size
+            saved.append((name, place_upload(tmp_path, directory, name, content_hash), content_hash))
+    return saved
+
+
+async def store_zip_upload(upload, directory, extensions):
+    """Save every member of an uploaded zip whose name ends with one of `extensions`; returns (filename, path, sha256) tuples.
+
+    Answers 400 for a file that is not a zip and 413 past the member, total or count caps.
+    """
+    zip_path = upload_tmp_path(directory)
+    await save_upload(upload, zip_path)
+    try:
+        return await run_cpu(_expand_zip, zip_path, directory, extensions)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail=f"{upload.filename} is not a valid zip archive")
+    finally:
+        os.remove(zip_path)
+
+
+def _cpu_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="scoring-cpu")
+        return _executor
+
+
+def _stop_waiting(task):
+    # Called when the task starts and again when its caller is done; only the first counts.
+    global _waiting
+    with _lock:
+        if task["waiting"]:
+            task["waiting"] = False
+            _waiting -= 1
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run CPU-bound scoring work on the dedicated executor, keeping the request's context (stage timings)."""
+    global _waiting
+    context = contextvars.copy_context()
+    task = {"waiting": True}
+
+    def call():
+        _stop_waiting(task)
+        return context.run(fn, *args, **kwargs)
+
+    executor = _cpu_executor()
+    with _lock:
+        _waiting += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+    finally:
+        _stop_waiting(task)  # a cancelled request whose task never started
+
+
+def cpu_queue_depth():
+    with _lock:
+        return _waiting
+
+
+def _reset():
+    global _executor, _lock, _waiting
+    _lock = threading.Lock()
+    _executor = None
+    _waiting = 0
+
+
+os.register_at_fork(after_in_child=_reset)
+metrics.describe("uploads_rejected_total", "counter", "Uploads refused before scoring, by reason.")